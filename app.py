@@ -8,63 +8,342 @@ from flask import Flask, render_template, request, jsonify, send_file
 import pandas as pd
 import numpy as np
 import os
+import csv
+import datetime
+import itertools
 import json
+import multiprocessing
+import re
+import subprocess
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
 import sys
 
+try:
+    from numba import njit, prange
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+try:
+    from pykrige.ok import OrdinaryKriging
+    import rasterio
+    from rasterio.transform import from_bounds
+    HAS_GEOSPATIAL = True
+except ImportError:
+    HAS_GEOSPATIAL = False
+
+try:
+    from scipy.spatial import cKDTree
+    HAS_SCIPY = True
+except ImportError:
+    HAS_SCIPY = False
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
 app = Flask(__name__)
 
+def json_response(payload):
+    """JSON response serialized with orjson when available, else jsonify"""
+    if HAS_ORJSON:
+        try:
+            body = orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+            return app.response_class(body, mimetype='application/json')
+        except TypeError:
+            pass  # a type orjson doesn't know; let Flask's encoder try
+    return jsonify(payload)
+
+def file_etag(file_path):
+    """ETag for responses derived only from a file's contents"""
+    st = os.stat(file_path)
+    return f'{st.st_mtime_ns:x}-{st.st_size:x}'
+
+def not_modified(etag):
+    """304 response if the client already holds this ETag, else None"""
+    if request.if_none_match.contains(etag):
+        resp = app.response_class(status=304)
+        resp.set_etag(etag)
+        return resp
+    return None
+
+def with_etag(resp, etag):
+    """Attach the ETag and a short private cache lifetime to a response"""
+    resp.set_etag(etag)
+    resp.headers['Cache-Control'] = 'private, max-age=60'
+    return resp
+
 # Configuration
 DATA_DIR = '/app/data'
 OUTPUTS_DIR = '/app/outputs'
 SCRIPTS_DIR = '/app/scripts'
+DF_CACHE_LIMIT_BYTES = 2 << 30  # in-memory budget for parsed CSVs
+JOBS_LIMIT = 256  # finished background jobs kept for status polling
+
+# Column-name patterns by role; a bare x/y only counts as a whole name or _-delimited token
+_LAT_RE = re.compile(r'lat|northing|(?:^|_)y(?:$|_)', re.I)
+_LON_RE = re.compile(r'lon|lng|easting|(?:^|_)x(?:$|_)', re.I)
+_DATE_RE = re.compile(r'date|time|day|month|year', re.I)
+
+def _classify_columns(columns):
+    """Split column names into latitude, longitude and date candidates"""
+    lat_cands = [c for c in columns if _LAT_RE.search(c)]
+    lon_cands = [c for c in columns if _LON_RE.search(c) and not _LAT_RE.search(c)]
+    date_cands = [c for c in columns if _DATE_RE.search(c)]
+    return lat_cands, lon_cands, date_cands
+
+def detect_coordinate_columns(columns):
+    """Auto-detect coordinate columns from a list of column names"""
+    lat_cands, lon_cands, _ = _classify_columns(columns)
+    
+    if lat_cands and lon_cands:
+        return {'latitude': lat_cands[0], 'longitude': lon_cands[0]}
+    return None
+
+def _dates_as_text(df):
+    """Render the date/timestamp columns Arrow infers as ISO strings, as the C engine leaves them"""
+    for col in df.columns:
+        series = df[col]
+        if pd.api.types.is_datetime64_any_dtype(series):
+            df[col] = series.astype(str).where(series.notna())
+        elif series.dtype == object:
+            first = series.first_valid_index()
+            if first is not None and isinstance(series[first], datetime.date):
+                df[col] = series.map(lambda d: d.isoformat(), na_action='ignore')
+    return df
+
+def read_csv(file_path):
+    """Parse a CSV with the multithreaded Arrow reader, falling back to pandas' C engine"""
+    if HAS_PYARROW:
+        try:
+            return _dates_as_text(pd.read_csv(file_path, engine='pyarrow'))
+        except (pa.ArrowInvalid, ValueError):
+            pass  # quirks Arrow rejects (ragged rows, odd quoting, ...)
+    return pd.read_csv(file_path)
+
+# Parsed CSVs in LRU order, keyed by (path, mtime_ns, size) -> (DataFrame, nbytes)
+_DF_CACHE = OrderedDict()
+_DF_CACHE_BYTES = 0
+_DF_CACHE_LOCK = threading.Lock()
+
+def load_df(file_path):
+    """Load a CSV, reusing the parsed DataFrame while the file is unchanged.
 
-def detect_coordinate_columns(df):
-    """Auto-detect coordinate columns in a DataFrame"""
-    lat_patterns = ['lat', 'latitude', 'y', 'northing']
-    lon_patterns = ['lon', 'long', 'longitude', 'x', 'easting']
+    The returned frame is shared between requests and must not be modified in place.
+    """
+    global _DF_CACHE_BYTES
+    st = os.stat(file_path)
+    key = (file_path, st.st_mtime_ns, st.st_size)
+    with _DF_CACHE_LOCK:
+        cached = _DF_CACHE.get(key)
+        if cached is not None:
+            _DF_CACHE.move_to_end(key)
+            return cached[0]
     
-    lat_col = None
-    lon_col = None
+    df = read_csv(file_path)
+    nbytes = int(df.memory_usage(deep=True).sum())
     
+    with _DF_CACHE_LOCK:
+        # Drop frames parsed from older versions of this file
+        for stale in [k for k in _DF_CACHE if k[0] == file_path and k != key]:
+            _DF_CACHE_BYTES -= _DF_CACHE.pop(stale)[1]
+        if key not in _DF_CACHE and nbytes <= DF_CACHE_LIMIT_BYTES:
+            _DF_CACHE[key] = (df, nbytes)
+            _DF_CACHE_BYTES += nbytes
+            while _DF_CACHE_BYTES > DF_CACHE_LIMIT_BYTES:
+                _DF_CACHE_BYTES -= _DF_CACHE.popitem(last=False)[1][1]
+    return df
+
+def column_statistics(df):
+    """Per-column counts, uniques, numeric moments and samples, each computed in one pass over the frame"""
+    numeric_cols = [col for col in df.columns if pd.api.types.is_numeric_dtype(df[col])]
+    head = df.head(3)
+    head_has_nulls = head.isnull().any()
+    
+    samples = {}
     for col in df.columns:
-        col_lower = col.lower()
-        if any(pattern in col_lower for pattern in lat_patterns):
-            lat_col = col
-        elif any(pattern in col_lower for pattern in lon_patterns):
-            lon_col = col
+        # Only columns with gaps in their first rows need a scan for non-null samples
+        samples[col] = df[col].dropna().head(3).tolist() if head_has_nulls[col] else head[col].tolist()
     
-    if lat_col and lon_col:
-        return {'latitude': lat_col, 'longitude': lon_col}
-    return None
+    return {
+        'non_null': df.count(),
+        'unique': df.nunique(),
+        'numeric': set(numeric_cols),
+        'moments': df[numeric_cols].agg(['min', 'max', 'mean', 'std']),
+        'samples': samples
+    }
+
+def idw_interpolate(lats, lons, values, grid_lat, grid_lon, chunk_size=1024):
+    """Inverse distance weighted (power 2) interpolation onto a 2-D grid"""
+    values = np.asarray(values, dtype=np.float64)
+    gy = grid_lat.reshape(-1, 1)
+    gx = grid_lon.reshape(-1, 1)
+    num = np.zeros(gy.shape[0])
+    den = np.zeros(gy.shape[0])
+    
+    # Tile the sample axis so the (cells, chunk) weight matrix stays bounded
+    for start in range(0, len(values), chunk_size):
+        stop = start + chunk_size
+        d2 = (gy - lats[start:stop]) ** 2 + (gx - lons[start:stop]) ** 2
+        np.maximum(d2, 1e-20, out=d2)
+        weights = np.reciprocal(d2, out=d2)
+        num += weights @ values[start:stop]
+        den += weights.sum(axis=1)
+    
+    return (num / den).reshape(grid_lat.shape)
+
+def idw_knn_interpolate(lats, lons, values, grid_lat, grid_lon, k=16):
+    """IDW (power 2) over the k nearest samples of each grid cell via a KD-tree"""
+    values = np.asarray(values, dtype=np.float64)
+    k = min(k, len(values))
+    tree = cKDTree(np.column_stack([lats, lons]))
+    pts = np.column_stack([grid_lat.ravel(), grid_lon.ravel()])
+    d, idx = tree.query(pts, k=k, workers=-1)
+    if k == 1:
+        d, idx = d[:, None], idx[:, None]
+    
+    w = 1.0 / np.maximum(d * d, 1e-20)
+    return ((w * values[idx]).sum(axis=1) / w.sum(axis=1)).reshape(grid_lat.shape)
+
+if HAS_NUMBA:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _idw_numba(lats, lons, values, grid_lats, grid_lons, out):
+        """Fused IDW kernel: one pass per grid cell, no (cells, samples) temporary"""
+        for i in prange(grid_lats.shape[0]):
+            for j in range(grid_lons.shape[0]):
+                num = 0.0
+                den = 0.0
+                for k in range(values.shape[0]):
+                    dlat = grid_lats[i] - lats[k]
+                    dlon = grid_lons[j] - lons[k]
+                    d2 = dlat * dlat + dlon * dlon
+                    if d2 < 1e-20:
+                        d2 = 1e-20
+                    w = 1.0 / d2
+                    num += w * values[k]
+                    den += w
+                out[i, j] = num / den
+
+def warm_idw_kernel():
+    """Compile the Numba IDW kernel up front so the first request isn't penalized"""
+    if HAS_NUMBA:
+        dummy = np.zeros(2)
+        _idw_numba(dummy, dummy, dummy, dummy, dummy, np.empty((2, 2)))
+
+def build_grid(extent, resolution):
+    """Buffered regular grid over a (lat_min, lat_max, lon_min, lon_max) extent"""
+    lat_min, lat_max, lon_min, lon_max = extent
+    lat_buffer = (lat_max - lat_min) * 0.1
+    lon_buffer = (lon_max - lon_min) * 0.1
+    
+    grid_lats = np.linspace(lat_min - lat_buffer, lat_max + lat_buffer, resolution)
+    grid_lons = np.linspace(lon_min - lon_buffer, lon_max + lon_buffer, resolution)
+    grid_lon, grid_lat = np.meshgrid(grid_lons, grid_lats)
+    bounds = (grid_lons[0], grid_lats[0], grid_lons[-1], grid_lats[-1])
+    return grid_lats, grid_lons, grid_lat, grid_lon, bounds
+
+def _init_interpolation_worker():
+    """Warm each pool worker; importing this module already loads pykrige/rasterio"""
+    warm_idw_kernel()
+
+# Background jobs run on threads that mostly wait: interpolation jobs fan their
+# variables out to a warm process pool (spawned, since forking a threaded
+# server is unsafe) and Nextflow jobs wait on a subprocess
+_EXECUTOR = None
+_JOB_THREADS = ThreadPoolExecutor(max_workers=8)
+_JOBS = OrderedDict()
+_JOBS_LOCK = threading.Lock()
+
+def get_executor():
+    """Create the interpolation process pool on first use"""
+    global _EXECUTOR
+    with _JOBS_LOCK:
+        if _EXECUTOR is None:
+            _EXECUTOR = ProcessPoolExecutor(
+                max_workers=os.cpu_count(),
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_interpolation_worker,
+            )
+        return _EXECUTOR
+
+def submit_job(executor, fn, *args, job_id=None):
+    """Run fn in the background and register the future under a job id"""
+    job_id = job_id or str(uuid.uuid4())[:8]
+    future = executor.submit(fn, *args)
+    with _JOBS_LOCK:
+        _JOBS[job_id] = future
+        # Forget the oldest finished jobs once over the limit
+        for key in [k for k, f in _JOBS.items() if f.done()][:max(0, len(_JOBS) - JOBS_LIMIT)]:
+            del _JOBS[key]
+    return job_id
+
+def read_csv_preview(file_path, n_rows=3):
+    """Read the header and first few rows of a CSV as raw strings"""
+    with open(file_path, 'r', newline='', encoding='utf-8', errors='replace') as f:
+        reader = csv.reader(f)
+        columns = next(reader, [])
+        sample_data = [dict(zip(columns, row)) for row in itertools.islice(reader, n_rows)]
+    return columns, sample_data
+
+# Preview info per CSV, keyed by (path, mtime_ns, size) so edits invalidate it
+_CSV_INFO_CACHE = {}
+_CSV_INFO_CACHE_LOCK = threading.Lock()
 
 def get_csv_files():
     """Get list of available CSV files"""
     csv_files = []
     if os.path.exists(DATA_DIR):
-        for file in os.listdir(DATA_DIR):
-            if file.endswith('.csv'):
-                file_path = os.path.join(DATA_DIR, file)
+        live_keys = set()
+        with os.scandir(DATA_DIR) as entries:
+            for entry in entries:
+                if not entry.name.endswith('.csv'):
+                    continue
+                file_path = entry.path
                 try:
-                    # Get basic info about the CSV
-                    df = pd.read_csv(file_path, nrows=5)  # Just read first 5 rows for info
-                    coords = detect_coordinate_columns(df)
-                    info = {
-                        'name': file,
-                        'path': file_path,
-                        'size': os.path.getsize(file_path),
-                        'columns': list(df.columns),
-                        'rows_preview': len(df),
-                        'coordinates': coords,
-                        'sample_data': df.head(3).to_dict('records')
-                    }
+                    st = entry.stat()
+                    key = (file_path, st.st_mtime_ns, st.st_size)
+                    live_keys.add(key)
+                    with _CSV_INFO_CACHE_LOCK:
+                        info = _CSV_INFO_CACHE.get(key)
+                    if info is None:
+                        # Get basic info about the CSV
+                        columns, sample_data = read_csv_preview(file_path)
+                        info = {
+                            'name': entry.name,
+                            'path': file_path,
+                            'size': st.st_size,
+                            'columns': columns,
+                            'rows_preview': len(sample_data),
+                            'coordinates': detect_coordinate_columns(columns),
+                            'sample_data': sample_data
+                        }
+                        with _CSV_INFO_CACHE_LOCK:
+                            _CSV_INFO_CACHE[key] = info
                     csv_files.append(info)
                 except Exception as e:
                     csv_files.append({
-                        'name': file,
+                        'name': entry.name,
                         'path': file_path,
                         'error': str(e)
                     })
+        
+        # Prune entries for files that were removed or rewritten
+        with _CSV_INFO_CACHE_LOCK:
+            for key in [k for k in _CSV_INFO_CACHE if k not in live_keys]:
+                del _CSV_INFO_CACHE[key]
     return csv_files
 
 @app.route('/')
@@ -97,12 +376,15 @@ def csv_info(filename):
         return jsonify({'error': 'File not found'}), 404
     
     try:
-        df = pd.read_csv(file_path)
+        etag = file_etag(file_path)
+        cached = not_modified(etag)
+        if cached is not None:
+            return cached
+        
+        df = load_df(file_path)
         
         # Auto-detect coordinate columns
-        lat_candidates = [col for col in df.columns if any(term in col.lower() for term in ['lat', 'y', 'northing'])]
-        lon_candidates = [col for col in df.columns if any(term in col.lower() for term in ['lon', 'lng', 'x', 'easting'])]
-        date_candidates = [col for col in df.columns if any(term in col.lower() for term in ['date', 'time', 'day', 'month', 'year'])]
+        lat_candidates, lon_candidates, date_candidates = _classify_columns(df.columns)
         
         # Get numeric columns for interpolation
         numeric_columns = list(df.select_dtypes(include=[np.number]).columns)
@@ -122,7 +404,7 @@ def csv_info(filename):
             },
             'missing_values': df.isnull().sum().to_dict()
         }
-        return jsonify(info)
+        return with_etag(json_response(info), etag)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -134,32 +416,33 @@ def variable_selection(filename):
         return jsonify({'error': 'File not found'}), 404
     
     try:
-        df = pd.read_csv(file_path)
+        df = load_df(file_path)
         
         # Column analysis
+        stats = column_statistics(df)
+        moments = stats['moments']
         column_info = {}
         for col in df.columns:
-            col_data = df[col].dropna()
+            non_null = int(stats['non_null'][col])
             column_info[col] = {
                 'dtype': str(df[col].dtype),
-                'non_null_count': len(col_data),
-                'null_percentage': (df[col].isnull().sum() / len(df)) * 100,
-                'is_numeric': pd.api.types.is_numeric_dtype(df[col]),
-                'unique_values': df[col].nunique(),
-                'sample_values': col_data.head(3).tolist() if len(col_data) > 0 else []
+                'non_null_count': non_null,
+                'null_percentage': ((len(df) - non_null) / len(df)) * 100,
+                'is_numeric': col in stats['numeric'],
+                'unique_values': int(stats['unique'][col]),
+                'sample_values': stats['samples'][col]
             }
             
-            if pd.api.types.is_numeric_dtype(df[col]) and len(col_data) > 0:
+            if col in stats['numeric'] and non_null > 0:
                 column_info[col].update({
-                    'min': float(col_data.min()),
-                    'max': float(col_data.max()),
-                    'mean': float(col_data.mean()),
-                    'std': float(col_data.std())
+                    'min': float(moments.at['min', col]),
+                    'max': float(moments.at['max', col]),
+                    'mean': float(moments.at['mean', col]),
+                    'std': float(moments.at['std', col])
                 })
         
         # Extract numeric variables for interpolation
         numeric_variables = []
-        coordinate_candidates = {'latitude': [], 'longitude': []}
         
         for col, info in column_info.items():
             if info['is_numeric']:
@@ -173,13 +456,13 @@ def variable_selection(filename):
                     'mean_value': info.get('mean', 'N/A'),
                     'std_value': info.get('std', 'N/A')
                 })
-                
-                # Check for coordinate patterns
-                col_lower = col.lower()
-                if any(pattern in col_lower for pattern in ['lat', 'latitude', 'y']):
-                    coordinate_candidates['latitude'].append(col)
-                elif any(pattern in col_lower for pattern in ['lon', 'longitude', 'long', 'x']):
-                    coordinate_candidates['longitude'].append(col)
+        
+        # Check for coordinate patterns
+        lat_candidates, lon_candidates, _ = _classify_columns(df.columns)
+        coordinate_candidates = {
+            'latitude': [col for col in lat_candidates if column_info[col]['is_numeric']],
+            'longitude': [col for col in lon_candidates if column_info[col]['is_numeric']]
+        }
         
         return jsonify({
             'filename': filename,
@@ -204,7 +487,7 @@ def process_csv():
         return jsonify({'error': 'File not found'}), 404
     
     try:
-        df = pd.read_csv(file_path)
+        df = load_df(file_path)
         
         if operation == 'info':
             result = {
@@ -215,16 +498,24 @@ def process_csv():
                 'sample': df.head(5).to_dict('records')
             }
         elif operation == 'summary':
+            numeric = df.select_dtypes(include='number')
             result = {
-                'numeric_summary': df.describe().to_dict() if df.select_dtypes(include='number').shape[1] > 0 else {},
+                'numeric_summary': numeric.agg(['count', 'mean', 'std', 'min', 'max']).to_dict() if numeric.shape[1] > 0 else {},
                 'missing_values': df.isnull().sum().to_dict(),
                 'shape': df.shape
             }
         elif operation == 'export_clean':
             # Basic cleaning - remove rows with all NaN values
-            df_clean = df.dropna(how='all')
+            df_clean = df[df.notna().any(axis=1)]
             output_path = os.path.join(OUTPUTS_DIR, f"cleaned_{filename}")
-            df_clean.to_csv(output_path, index=False)
+            if HAS_PYARROW:
+                pacsv.write_csv(
+                    pa.Table.from_pandas(df_clean, preserve_index=False),
+                    output_path,
+                    write_options=pacsv.WriteOptions(batch_size=65536)
+                )
+            else:
+                df_clean.to_csv(output_path, index=False, chunksize=100_000)
             result = {
                 'message': f'Cleaned CSV saved to outputs/cleaned_{filename}',
                 'original_rows': len(df),
@@ -244,9 +535,149 @@ def variable_interface(filename):
     """Variable selection interface"""
     return render_template('variables.html', filename=filename)
 
+def _interp_one(variable, lats, lons, values, grid, filename, config):
+    """Interpolate one variable onto its grid and save a GeoTIFF; runs in a pool worker"""
+    grid_lats, grid_lons, grid_lat, grid_lon, bounds, transform = grid
+    method = config['method'].lower()
+    
+    try:
+        if method == 'kriging':
+            ok = OrdinaryKriging(
+                lons, lats, values,
+                variogram_model='linear',
+                verbose=False,
+                enable_plotting=False
+            )
+            z, ss = ok.execute('grid', grid_lons, grid_lats)
+            interpolated = z
+        elif method == 'idw_knn' and HAS_SCIPY:
+            interpolated = idw_knn_interpolate(lats, lons, values, grid_lat, grid_lon)
+        elif HAS_NUMBA:  # IDW fallback, compiled kernel
+            interpolated = np.empty_like(grid_lat, dtype=np.float64)
+            _idw_numba(lats, lons, values, grid_lats, grid_lons, interpolated)
+        else:  # IDW fallback
+            interpolated = idw_interpolate(lats, lons, values, grid_lat, grid_lon)
+        
+        # Save as GeoTIFF
+        run_id = str(uuid.uuid4())[:8]
+        output_file = f"{filename.replace('.csv', '')}_{variable}_{run_id}.tif"
+        output_path = os.path.join(OUTPUTS_DIR, output_file)
+        
+        # float32, tiled and compressed: half the bytes, windowed reads
+        interpolated = np.asarray(interpolated, dtype=np.float32)
+        with rasterio.open(
+            output_path, 'w',
+            driver='GTiff',
+            height=config['resolution'],
+            width=config['resolution'],
+            count=1,
+            dtype='float32',
+            crs='EPSG:4326',
+            transform=transform,
+            nodata=np.nan,
+            tiled=True,
+            blockxsize=256,
+            blockysize=256,
+            compress='zstd',
+            zstd_level=3,
+            predictor=3,
+        ) as dst:
+            dst.write(interpolated, 1)
+        
+        return variable, {
+            'status': 'success',
+            'n_points': len(values),
+            'value_range': [float(values.min()), float(values.max())],
+            'method_used': method,
+            'output_file': output_file,
+            'grid_bounds': bounds
+        }
+        
+    except Exception as e:
+        return variable, {'error': str(e)}
+
+def _do_interpolation(filename, config):
+    """Prepare each variable's points and grid, then interpolate them in parallel"""
+    if not HAS_GEOSPATIAL:
+        raise RuntimeError('pykrige and rasterio are required for interpolation')
+
+    # Load data
+    file_path = os.path.join(DATA_DIR, filename)
+    df = load_df(file_path)
+    
+    # Auto-detect coordinates if not provided
+    if not config['lat_column'] or not config['lon_column']:
+        coords = detect_coordinate_columns(df.columns)
+        if coords:
+            config['lat_column'] = coords['latitude']
+            config['lon_column'] = coords['longitude']
+        else:
+            raise ValueError('Could not detect coordinate columns. Please specify lat_column and lon_column.')
+    
+    # Validate coordinate columns exist
+    missing_cols = []
+    if config['lat_column'] not in df.columns:
+        missing_cols.append(config['lat_column'])
+    if config['lon_column'] not in df.columns:
+        missing_cols.append(config['lon_column'])
+        
+    if missing_cols:
+        raise ValueError(f'Coordinate columns not found: {", ".join(missing_cols)}')
+    
+    # Clean coordinate data
+    df_clean = df.dropna(subset=[config['lat_column'], config['lon_column']])
+    
+    if len(df_clean) < 10:
+        raise ValueError(f'Insufficient coordinate data: {len(df_clean)} points')
+    
+    results = {}
+    futures = []
+    # Variables whose points span the same extent share one grid and transform
+    grids = {}
+    executor = get_executor()
+    
+    # Process each variable; workers only receive its coordinate/value arrays
+    for variable in config['variables']:
+        if variable not in df.columns:
+            continue
+            
+        # Get clean data for this variable
+        var_data = df_clean.dropna(subset=[variable])
+        
+        if len(var_data) < 10:
+            results[variable] = {'error': f'Insufficient data points: {len(var_data)}'}
+            continue
+        
+        # Extract coordinates and values as native float64 arrays
+        lats = var_data[config['lat_column']].to_numpy(dtype=np.float64, na_value=np.nan)
+        lons = var_data[config['lon_column']].to_numpy(dtype=np.float64, na_value=np.nan)
+        values = var_data[variable].to_numpy(dtype=np.float64, na_value=np.nan)
+        
+        # Create (or reuse) the interpolation grid
+        extent = (lats.min(), lats.max(), lons.min(), lons.max())
+        if extent not in grids:
+            grid = build_grid(extent, config['resolution'])
+            grids[extent] = grid + (from_bounds(*grid[-1], config['resolution'], config['resolution']),)
+        
+        futures.append(executor.submit(
+            _interp_one, variable, lats, lons, values, grids[extent], filename, config
+        ))
+    
+    for future in futures:
+        variable, result = future.result()
+        results[variable] = result
+    output_files = [r['output_file'] for r in results.values() if 'output_file' in r]
+    
+    return {
+        'status': 'completed',
+        'results': results,
+        'output_files': output_files,
+        'config': config
+    }
+
 @app.route('/api/run_interpolation', methods=['POST'])
 def run_interpolation():
-    """Run spatial interpolation with selected variables"""
+    """Queue spatial interpolation of the selected variables as a background job"""
     data = request.json
     filename = data.get('filename')
     config = {
@@ -264,148 +695,19 @@ def run_interpolation():
         return jsonify({'error': 'No variables selected for interpolation'}), 400
     
     try:
-        # Import interpolation libraries
-        from pykrige.ok import OrdinaryKriging
-        import numpy as np
-        import rasterio
-        from rasterio.transform import from_bounds
-        import matplotlib.pyplot as plt
-        import os
-        import uuid
-        
-        # Load data
-        file_path = os.path.join(DATA_DIR, filename)
-        df = pd.read_csv(file_path)
-        
-        # Auto-detect coordinates if not provided
-        if not config['lat_column'] or not config['lon_column']:
-            coords = detect_coordinate_columns(df)
-            if coords:
-                config['lat_column'] = coords['latitude']
-                config['lon_column'] = coords['longitude']
-            else:
-                return jsonify({'error': 'Could not detect coordinate columns. Please specify lat_column and lon_column.'}), 400
-        
-        # Validate coordinate columns exist
-        missing_cols = []
-        if config['lat_column'] not in df.columns:
-            missing_cols.append(config['lat_column'])
-        if config['lon_column'] not in df.columns:
-            missing_cols.append(config['lon_column'])
-            
-        if missing_cols:
-            return jsonify({'error': f'Coordinate columns not found: {", ".join(missing_cols)}'}), 400
-        
-        # Clean coordinate data
-        df_clean = df.dropna(subset=[config['lat_column'], config['lon_column']])
-        
-        if len(df_clean) < 10:
-            return jsonify({'error': f'Insufficient coordinate data: {len(df_clean)} points'}), 400
-        
-        results = {}
-        output_files = []
-        
-        # Process each variable
-        for variable in config['variables']:
-            if variable not in df.columns:
-                continue
-                
-            # Get clean data for this variable
-            var_data = df_clean.dropna(subset=[variable])
-            
-            if len(var_data) < 10:
-                results[variable] = {'error': f'Insufficient data points: {len(var_data)}'}
-                continue
-            
-            # Extract coordinates and values
-            lats = var_data[config['lat_column']].values
-            lons = var_data[config['lon_column']].values
-            values = var_data[variable].values
-            
-            # Create interpolation grid
-            lat_min, lat_max = lats.min(), lats.max()
-            lon_min, lon_max = lons.min(), lons.max()
-            
-            # Add buffer
-            lat_buffer = (lat_max - lat_min) * 0.1
-            lon_buffer = (lon_max - lon_min) * 0.1
-            
-            grid_lats = np.linspace(lat_min - lat_buffer, lat_max + lat_buffer, config['resolution'])
-            grid_lons = np.linspace(lon_min - lon_buffer, lon_max + lon_buffer, config['resolution'])
-            grid_lon, grid_lat = np.meshgrid(grid_lons, grid_lats)
-            
-            # Perform interpolation
-            method = config['method'].lower()
-            
-            try:
-                if method == 'kriging':
-                    ok = OrdinaryKriging(
-                        lons, lats, values,
-                        variogram_model='linear',
-                        verbose=False,
-                        enable_plotting=False
-                    )
-                    z, ss = ok.execute('grid', grid_lons, grid_lats)
-                    interpolated = z
-                else:  # IDW fallback
-                    interpolated = np.zeros_like(grid_lat)
-                    for i in range(config['resolution']):
-                        for j in range(config['resolution']):
-                            distances = np.sqrt((lats - grid_lat[i,j])**2 + (lons - grid_lon[i,j])**2)
-                            distances = np.maximum(distances, 1e-10)
-                            weights = 1 / (distances ** 2)
-                            interpolated[i,j] = np.sum(weights * values) / np.sum(weights)
-                
-                # Save as GeoTIFF
-                run_id = str(uuid.uuid4())[:8]
-                output_file = f"{filename.replace('.csv', '')}_{variable}_{run_id}.tif"
-                output_path = os.path.join(OUTPUTS_DIR, output_file)
-                
-                bounds = (grid_lon.min(), grid_lat.min(), grid_lon.max(), grid_lat.max())
-                transform = from_bounds(*bounds, config['resolution'], config['resolution'])
-                
-                with rasterio.open(
-                    output_path, 'w',
-                    driver='GTiff',
-                    height=config['resolution'],
-                    width=config['resolution'],
-                    count=1,
-                    dtype=interpolated.dtype,
-                    crs='EPSG:4326',
-                    transform=transform,
-                ) as dst:
-                    dst.write(interpolated, 1)
-                
-                output_files.append(output_file)
-                
-                results[variable] = {
-                    'status': 'success',
-                    'n_points': len(values),
-                    'value_range': [float(values.min()), float(values.max())],
-                    'method_used': method,
-                    'output_file': output_file,
-                    'grid_bounds': bounds
-                }
-                
-            except Exception as e:
-                results[variable] = {'error': str(e)}
-        
-        return jsonify({
-            'status': 'completed',
-            'results': results,
-            'output_files': output_files,
-            'config': config
-        })
-        
+        job_id = submit_job(_JOB_THREADS, _do_interpolation, filename, config)
     except Exception as e:
         return jsonify({'error': f'Interpolation failed: {str(e)}'}), 500
+    
+    return jsonify({
+        'status': 'running',
+        'job_id': job_id,
+        'status_url': f'/api/workflow_status/{job_id}'
+    }), 202
 
 @app.route('/api/run_nextflow', methods=['POST'])
 def run_nextflow_workflow():
-    """Run Nextflow workflow for batch processing"""
-    import subprocess
-    import uuid
-    
+    """Start a Nextflow batch workflow as a background job"""
     try:
         data = request.json
         filename = data.get('filename')
@@ -445,55 +747,98 @@ def run_nextflow_workflow():
             '-resume'
         ]
         
-        # Run Nextflow workflow
-        print(f"Running Nextflow workflow: {' '.join(nextflow_cmd)}")
+        job_id = submit_job(_JOB_THREADS, _do_nextflow, nextflow_cmd, workflow_id, job_id=workflow_id)
+        return jsonify({
+            'status': 'running',
+            'workflow_id': workflow_id,
+            'job_id': job_id,
+            'status_url': f'/api/workflow_status/{job_id}'
+        }), 202
+            
+    except Exception as e:
+        return jsonify({'error': f'Workflow execution failed: {str(e)}'}), 500
+
+def _do_nextflow(nextflow_cmd, workflow_id):
+    """Run a Nextflow command to completion; runs on the Nextflow thread pool"""
+    print(f"Running Nextflow workflow: {' '.join(nextflow_cmd)}")
+    try:
         result = subprocess.run(nextflow_cmd, 
                               capture_output=True, 
                               text=True, 
                               cwd='/app',
                               timeout=3600)  # 1 hour timeout
-        
-        if result.returncode == 0:
-            return jsonify({
-                'status': 'success',
-                'message': 'Nextflow workflow completed successfully',
-                'workflow_id': workflow_id,
-                'stdout': result.stdout,
-                'output_dir': OUTPUTS_DIR
-            })
-        else:
-            return jsonify({
-                'status': 'error',
-                'message': 'Nextflow workflow failed',
-                'workflow_id': workflow_id,
-                'error': result.stderr,
-                'stdout': result.stdout
-            }), 500
-            
     except subprocess.TimeoutExpired:
-        return jsonify({'error': 'Workflow timeout (>1 hour)'}), 500
-    except Exception as e:
-        return jsonify({'error': f'Workflow execution failed: {str(e)}'}), 500
+        return {'status': 'error', 'workflow_id': workflow_id, 'error': 'Workflow timeout (>1 hour)'}
+    
+    if result.returncode == 0:
+        return {
+            'status': 'success',
+            'message': 'Nextflow workflow completed successfully',
+            'workflow_id': workflow_id,
+            'stdout': result.stdout,
+            'output_dir': OUTPUTS_DIR
+        }
+    return {
+        'status': 'error',
+        'message': 'Nextflow workflow failed',
+        'workflow_id': workflow_id,
+        'error': result.stderr,
+        'stdout': result.stdout
+    }
+
+# Parsed workflow reports keyed by path -> ((mtime_ns, size), data)
+_REPORT_CACHE = {}
+_REPORT_CACHE_LOCK = threading.Lock()
+
+def load_report(entry):
+    """Parse a workflow report JSON, reusing the last parse while the file is unchanged"""
+    st = entry.stat()
+    stamp = (st.st_mtime_ns, st.st_size)
+    with _REPORT_CACHE_LOCK:
+        cached = _REPORT_CACHE.get(entry.path)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    with open(entry.path, 'rb') as f:
+        report_data = orjson.loads(f.read()) if HAS_ORJSON else json.load(f)
+    with _REPORT_CACHE_LOCK:
+        _REPORT_CACHE[entry.path] = (stamp, report_data)
+    return report_data
 
 @app.route('/api/workflow_status/<workflow_id>')
 def get_workflow_status(workflow_id):
-    """Get status of a Nextflow workflow"""
+    """Get status of a background job or Nextflow workflow"""
+    with _JOBS_LOCK:
+        future = _JOBS.get(workflow_id)
+    if future is not None:
+        if not future.done():
+            return jsonify({
+                'status': 'running',
+                'job_id': workflow_id,
+                'workflow_id': workflow_id,
+                'message': 'Job still in progress'
+            })
+        try:
+            payload = future.result()
+        except Exception as e:
+            return jsonify({'status': 'failed', 'job_id': workflow_id, 'error': str(e)})
+        return jsonify({**payload, 'job_id': workflow_id})
+    
     try:
         # Check for workflow outputs
         work_dir = f'/tmp/nextflow_work_{workflow_id}'
-        report_files = [f for f in os.listdir(OUTPUTS_DIR) 
-                       if f.startswith('workflow_report_') and f.endswith('.json')]
+        with os.scandir(OUTPUTS_DIR) as it:
+            report_files = [e for e in it
+                            if e.name.startswith('workflow_report_') and e.name.endswith('.json')]
         
         if report_files:
-            latest_report = max(report_files, key=lambda x: os.path.getctime(os.path.join(OUTPUTS_DIR, x)))
-            with open(os.path.join(OUTPUTS_DIR, latest_report), 'r') as f:
-                report_data = json.load(f)
+            latest_report = max(report_files, key=lambda e: e.stat().st_ctime)
+            report_data = load_report(latest_report)
             
             return jsonify({
                 'status': 'completed',
                 'workflow_id': workflow_id,
                 'report': report_data,
-                'report_file': latest_report
+                'report_file': latest_report.name
             })
         else:
             return jsonify({
@@ -531,59 +876,69 @@ def get_all_variables(filename):
     """Get all variables with detailed statistics for selection"""
     try:
         file_path = os.path.join(DATA_DIR, filename)
-        df = pd.read_csv(file_path)
+        etag = file_etag(file_path)
+        cached = not_modified(etag)
+        if cached is not None:
+            return cached
+        
+        df = load_df(file_path)
         
         variables = []
         coordinate_columns = []
+        lat_candidates, lon_candidates, _ = _classify_columns(df.columns)
+        lat_names, lon_names = set(lat_candidates), set(lon_candidates)
+        
+        stats = column_statistics(df)
+        moments = stats['moments']
         
         for col in df.columns:
-            col_data = df[col]
-            is_numeric = pd.api.types.is_numeric_dtype(col_data)
+            is_numeric = col in stats['numeric']
+            non_null = int(stats['non_null'][col])
+            unique = int(stats['unique'][col])
             
             variable_info = {
                 'name': col,
-                'type': str(col_data.dtype),
+                'type': str(df[col].dtype),
                 'is_numeric': is_numeric,
-                'total_count': len(col_data),
-                'non_null_count': int(col_data.count()),
-                'null_count': int(col_data.isnull().sum()),
-                'null_percentage': round((col_data.isnull().sum() / len(df)) * 100, 2),
-                'unique_values': int(col_data.nunique()),
-                'sample_values': col_data.dropna().head(3).tolist()
+                'total_count': len(df),
+                'non_null_count': non_null,
+                'null_count': len(df) - non_null,
+                'null_percentage': round(((len(df) - non_null) / len(df)) * 100, 2),
+                'unique_values': unique,
+                'sample_values': stats['samples'][col]
             }
             
             # Check if this could be a coordinate column
-            col_lower = col.lower()
-            is_coordinate = any(term in col_lower for term in ['lat', 'lon', 'x', 'y', 'north', 'east'])
+            is_coordinate = col in lat_names or col in lon_names
             
-            if is_numeric:
-                clean_data = col_data.dropna()
-                if len(clean_data) > 0:
-                    variable_info.update({
-                        'min_value': round(float(clean_data.min()), 4),
-                        'max_value': round(float(clean_data.max()), 4),
-                        'mean_value': round(float(clean_data.mean()), 4),
-                        'std_value': round(float(clean_data.std()), 4),
-                        'suitable_for_interpolation': col_data.count() >= 10 and col_data.nunique() > 5
+            if is_numeric and non_null > 0:
+                mn = float(moments.at['min', col])
+                mx = float(moments.at['max', col])
+                variable_info.update({
+                    'min_value': round(mn, 4),
+                    'max_value': round(mx, 4),
+                    'mean_value': round(float(moments.at['mean', col]), 4),
+                    'std_value': round(float(moments.at['std', col]), 4),
+                    'suitable_for_interpolation': non_null >= 10 and unique > 5
+                })
+                
+                # Check if values look like coordinates
+                if is_coordinate or (-90 <= mn <= 90 and -180 <= mx <= 180):
+                    coordinate_columns.append({
+                        'name': col,
+                        'type': 'latitude' if col in lat_names else 'longitude' if col in lon_names else 'coordinate',
+                        'range': [mn, mx]
                     })
-                    
-                    # Check if values look like coordinates
-                    if is_coordinate or (-90 <= clean_data.min() <= 90 and -180 <= clean_data.max() <= 180):
-                        coordinate_columns.append({
-                            'name': col,
-                            'type': 'latitude' if 'lat' in col_lower else 'longitude' if 'lon' in col_lower else 'coordinate',
-                            'range': [float(clean_data.min()), float(clean_data.max())]
-                        })
             
             variables.append(variable_info)
         
-        return jsonify({
+        return with_etag(json_response({
             'filename': filename,
             'total_rows': len(df),
             'variables': variables,
             'coordinate_columns': coordinate_columns,
             'numeric_variables': [v for v in variables if v['is_numeric'] and v.get('suitable_for_interpolation', False)]
-        })
+        }), etag)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -597,5 +952,8 @@ if __name__ == '__main__':
     # Ensure output directory exists
     os.makedirs(OUTPUTS_DIR, exist_ok=True)
     
+    warm_idw_kernel()
+    
     # Run the Flask app
-    app.run(host='0.0.0.0', port=8888, debug=True)
\ No newline at end of file
+    # Development server only; production runs wsgi.py under gunicorn
+    app.run(host='0.0.0.0', port=8888, debug=os.environ.get('FLASK_DEBUG') == '1')
\ No newline at end of file
@@ -6,7 +6,11 @@ Provides real-time monitoring and status updates for Docker-based workflows
 
 import time
 import json
-import subprocess
+import hashlib
+import heapq
+import http.client
+import itertools
+import socket
 import psutil
 import os
 from pathlib import Path
@@ -15,6 +19,21 @@ from flask import Flask, render_template, jsonify, request
 from flask_socketio import SocketIO, emit
 import threading
 import logging
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+    HAS_WATCHDOG = True
+except ImportError:
+    HAS_WATCHDOG = False
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -24,20 +43,255 @@ app = Flask(__name__)
 app.config['SECRET_KEY'] = 'cheaqi-monitor-secret'
 socketio = SocketIO(app, cors_allowed_origins="*")
 
+def dumps(obj):
+    """Serialize to a JSON string with orjson when available"""
+    if HAS_ORJSON:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(obj)
+
+def json_response(payload):
+    """JSON response serialized with orjson when available, else jsonify"""
+    if HAS_ORJSON:
+        return app.response_class(orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS), mimetype='application/json')
+    return jsonify(payload)
+
 # Configuration
 MONITOR_CONFIG = {
     'data_dir': '/app/data',
     'outputs_dir': '/app/outputs', 
     'scripts_dir': '/app/scripts',
     'work_dir': '/tmp/nextflow_work',
+    'docker_socket': '/var/run/docker.sock',
     'monitor_interval': 5,  # seconds
+    'collector_process': True,  # collect metrics in a child process, off the server's GIL
+    'dirsize_settle_seconds': 60,  # directories unchanged this long reuse cached listings
     'log_retention_hours': 24
 }
 
-# Global state
+# Host facts that don't change while the process runs
+_CPU_COUNT = psutil.cpu_count()
+_BOOT_TIME = psutil.boot_time()
+
+# Global state; system_metrics keeps its shape and is updated in place each tick
 workflow_status = {}
-system_metrics = {}
+system_metrics = {
+    'timestamp': None,
+    'cpu': {'percent': 0.0, 'count': _CPU_COUNT},
+    'memory': {'total': 0, 'used': 0, 'percent': 0.0, 'available': 0},
+    'disk': {'total': 0, 'used': 0, 'percent': 0.0, 'free': 0},
+    'docker': [],
+    'load_average': [0, 0, 0]
+}
 active_processes = {}
+_dirsize_cache = {}  # dir path -> (mtime_ns, its own file paths, subdir paths)
+
+LOG_TAIL_BYTES = 1000  # how much of each log /api/logs returns
+
+# Process names whose command line may reveal a Nextflow run (the JVM it execs into)
+NEXTFLOW_HOST_NAMES = frozenset({'java', 'bash', 'sh'})
+
+# Disk totals drift slowly; refresh them at most every DISK_USAGE_TTL seconds
+DISK_USAGE_TTL = 30
+_disk_usage_cache = (0.0, None)
+
+def cached_disk_usage(path='/'):
+    """psutil.disk_usage(path), reused for DISK_USAGE_TTL seconds"""
+    global _disk_usage_cache
+    checked_at, usage = _disk_usage_cache
+    now = time.monotonic()
+    if usage is None or now - checked_at > DISK_USAGE_TTL:
+        usage = psutil.disk_usage(path)
+        _disk_usage_cache = (now, usage)
+    return usage
+
+# Last serialized status, shared by the broadcast loop and per-client requests
+_status_cache = {'state': None, 'payload': None, 'at': 0.0}
+_status_lock = threading.Lock()
+
+def serialize_status(max_age=0.0, broadcast=False):
+    """Serialize the current status once; returns (payload, changed)
+
+    A payload younger than max_age seconds is reused as-is. For broadcast
+    calls, changed is False when nothing but timestamps moved since the
+    previous broadcast; other calls always report True.
+    """
+    with _status_lock:
+        if _status_cache['payload'] is not None and time.monotonic() - _status_cache['at'] < max_age:
+            return _status_cache['payload'], False
+        
+        state = {
+            'system': {k: v for k, v in system_metrics.items() if k != 'timestamp'},
+            'workflows': workflow_status,
+            'processes': active_processes
+        }
+        payload = dumps({**state, 'timestamp': datetime.now().isoformat()})
+        changed = True
+        if broadcast:
+            # Timestamp-free serialization is only needed to compare broadcasts
+            fingerprint = dumps(state)
+            changed = fingerprint != _status_cache['state']
+            _status_cache['state'] = fingerprint
+        _status_cache.update(payload=payload, at=time.monotonic())
+        return payload, changed
+
+class DockerSocketConnection(http.client.HTTPConnection):
+    """HTTP connection to the Docker Engine API over its UNIX socket"""
+    
+    def __init__(self, socket_path, timeout=10):
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = socket_path
+        
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+def _format_bytes(n, binary=False):
+    """Human-readable size in the units `docker stats` prints"""
+    base, units = (1024, ['B', 'KiB', 'MiB', 'GiB', 'TiB']) if binary else (1000, ['B', 'kB', 'MB', 'GB', 'TB'])
+    for unit in units[:-1]:
+        if abs(n) < base:
+            break
+        n /= base
+    else:
+        unit = units[-1]
+    return f"{n:.0f}{unit}" if unit == 'B' else f"{n:.3g}{unit}"
+
+STAT_BATCH = 256  # directory entries per concurrent stat batch
+_STAT_POOL = ThreadPoolExecutor(max_workers=8)
+
+def _stat_entries(entries):
+    """{path: (size, mtime)} for DirEntry objects, skipping ones that vanished"""
+    stats = {}
+    for entry in entries:
+        try:
+            st = entry.stat(follow_symlinks=False)
+        except OSError:
+            continue
+        stats[entry.path] = (st.st_size, st.st_mtime)
+    return stats
+
+class FileIndex:
+    """In-memory {path: (size, mtime)} view of a directory
+
+    Kept current by watchdog events when the directory is watched; otherwise
+    the owner calls rescan() before reading it.
+    """
+    
+    def __init__(self, root, suffix=None, recursive=True):
+        self.root = str(root)
+        self.suffix = suffix
+        self.recursive = recursive
+        self.watched = False
+        self._files = {}
+        self._version = 0  # bumped on every change; keys the memoized top-K
+        self._recent = (None, 0, [])
+        self._lock = threading.Lock()
+        
+    def _wanted(self, path):
+        if self.suffix and not path.endswith(self.suffix):
+            return False
+        return self.recursive or os.path.dirname(path) == self.root
+    
+    def _scan(self, top):
+        """One scandir pass with a single stat per matching file"""
+        found = {}
+        stack = [top]
+        while stack:
+            files = []
+            try:
+                with os.scandir(stack.pop()) as it:
+                    for entry in it:
+                        if entry.is_file(follow_symlinks=False):
+                            if self._wanted(entry.path):
+                                files.append(entry)
+                        elif self.recursive and entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+            except OSError:
+                continue
+            
+            # Large directories stat in concurrent batches to overlap syscall latency
+            if len(files) >= STAT_BATCH:
+                batches = [files[i:i + STAT_BATCH] for i in range(0, len(files), STAT_BATCH)]
+                for batch in _STAT_POOL.map(_stat_entries, batches):
+                    found.update(batch)
+            else:
+                found.update(_stat_entries(files))
+        return found
+        
+    def rescan(self):
+        found = self._scan(self.root)
+        with self._lock:
+            if found != self._files:
+                self._files = found
+                self._version += 1
+            
+    def update(self, path, is_directory=False):
+        if is_directory:
+            found = self._scan(path)
+            with self._lock:
+                self._files.update(found)
+                self._version += 1
+            return
+        if not self._wanted(path):
+            return
+        try:
+            st = os.stat(path)
+        except OSError:
+            self.remove(path)
+            return
+        with self._lock:
+            self._files[path] = (st.st_size, st.st_mtime)
+            self._version += 1
+            
+    def remove(self, path, is_directory=False):
+        with self._lock:
+            if is_directory:
+                prefix = path.rstrip(os.sep) + os.sep
+                for p in [p for p in self._files if p.startswith(prefix)]:
+                    del self._files[p]
+            else:
+                self._files.pop(path, None)
+            self._version += 1
+                
+    def snapshot(self):
+        with self._lock:
+            return dict(self._files)
+            
+    def recent(self, k):
+        """The k most recently modified (path, (size, mtime)) items, newest first
+
+        Recomputed with an O(N log k) heap only after the index has changed;
+        idle ticks get the memoized list.
+        """
+        with self._lock:
+            version, cached_k, items = self._recent
+            if version != self._version or cached_k != k:
+                items = heapq.nlargest(k, self._files.items(), key=lambda item: item[1][1])
+                self._recent = (self._version, k, items)
+            return items
+
+if HAS_WATCHDOG:
+    class _IndexEventHandler(FileSystemEventHandler):
+        """Apply inotify/watchdog events to a FileIndex"""
+        
+        def __init__(self, index):
+            super().__init__()
+            self.index = index
+            
+        def on_created(self, event):
+            self.index.update(event.src_path, event.is_directory)
+            
+        def on_modified(self, event):
+            if not event.is_directory:
+                self.index.update(event.src_path)
+                
+        def on_deleted(self, event):
+            self.index.remove(event.src_path, event.is_directory)
+            
+        def on_moved(self, event):
+            self.index.remove(event.src_path, event.is_directory)
+            self.index.update(event.dest_path, event.is_directory)
 
 class WorkflowMonitor:
     """Monitor Nextflow workflows and system resources"""
@@ -45,103 +299,217 @@ class WorkflowMonitor:
     def __init__(self):
         self.running = False
         self.workflows = {}
+        self._nextflow_procs = {}  # pid -> (psutil.Process, started isoformat), reused across ticks
+        self._io_pool = ThreadPoolExecutor(max_workers=4)
+        self._source_pool = ThreadPoolExecutor(max_workers=3)  # independent metric sources
+        self._docker_local = threading.local()  # one keep-alive API connection per thread
+        self._docker_prev = {}  # container id -> (cpu total_usage, system_cpu_usage) last tick
+        self.data_index = FileIndex(MONITOR_CONFIG['data_dir'], suffix='.csv', recursive=False)
+        self.output_index = FileIndex(MONITOR_CONFIG['outputs_dir'])
+        self._observer = None
+        self._collector = None
+        self._dirs_seen = set()
         
     def start_monitoring(self):
-        """Start the monitoring thread"""
+        """Start collecting, in a child process or a thread, and broadcasting"""
         self.running = True
-        monitor_thread = threading.Thread(target=self._monitor_loop, daemon=True)
+        self._start_watching()
+        if MONITOR_CONFIG['collector_process']:
+            parent_conn, child_conn = multiprocessing.Pipe(duplex=False)
+            self._collector = multiprocessing.get_context('spawn').Process(
+                target=_collector_main, args=(child_conn, dict(MONITOR_CONFIG)), daemon=True
+            )
+            self._collector.start()
+            child_conn.close()
+            monitor_thread = threading.Thread(target=self._relay_loop, args=(parent_conn,), daemon=True)
+        else:
+            psutil.cpu_percent(interval=None)  # prime the counters for non-blocking reads
+            monitor_thread = threading.Thread(target=self._monitor_loop, daemon=True)
         monitor_thread.start()
         logger.info("Workflow monitor started")
         
     def stop_monitoring(self):
         """Stop monitoring"""
         self.running = False
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer = None
+        if self._collector is not None:
+            self._collector.terminate()
+            self._collector = None
         logger.info("Workflow monitor stopped")
         
+    def _start_watching(self):
+        """Subscribe the file indexes to filesystem events where possible"""
+        if HAS_WATCHDOG:
+            self._observer = Observer()
+            for index in (self.data_index, self.output_index):
+                if os.path.isdir(index.root):
+                    self._observer.schedule(_IndexEventHandler(index), index.root, recursive=index.recursive)
+                    index.watched = True
+            self._observer.start()
+        # Seed after subscribing so no event falls between scan and watch
+        for index in (self.data_index, self.output_index):
+            index.rescan()
+        
+    def _collect(self):
+        """Run one tick of every metric source"""
+        # Sources are independent and mostly wait on I/O, so the tick
+        # takes as long as the slowest one rather than their sum
+        futures = [
+            self._source_pool.submit(self._update_system_metrics),
+            self._source_pool.submit(self._check_workflows),
+            self._source_pool.submit(self._update_file_status),
+        ]
+        for future in futures:
+            future.result()
+        
+    def _broadcast(self):
+        """Broadcast updates via WebSocket, serialized once and only when changed"""
+        payload, changed = serialize_status(broadcast=True)
+        if changed:
+            socketio.emit('status_update', payload)
+    
     def _monitor_loop(self):
-        """Main monitoring loop"""
+        """Main monitoring loop (in-process collection)"""
         while self.running:
             try:
-                self._update_system_metrics()
-                self._check_workflows()
-                self._update_file_status()
-                
-                # Broadcast updates via WebSocket
-                socketio.emit('status_update', {
-                    'timestamp': datetime.now().isoformat(),
-                    'system': system_metrics,
-                    'workflows': workflow_status,
-                    'processes': active_processes
-                })
-                
+                self._collect()
+                self._broadcast()
                 time.sleep(MONITOR_CONFIG['monitor_interval'])
                 
             except Exception as e:
                 logger.error(f"Monitor error: {e}")
                 time.sleep(10)
+                
+    def _relay_loop(self, conn):
+        """Apply each snapshot from the collector process, then broadcast it"""
+        while self.running:
+            try:
+                state = json.loads(conn.recv_bytes())
+            except (EOFError, OSError):
+                break
+            try:
+                _merge_into(system_metrics, state['system'])
+                workflow_status.update(state['workflows'])
+                active_processes.update(state['processes'])
+                self._broadcast()
+            except Exception as e:
+                logger.error(f"Relay error: {e}")
+        if self.running:
+            # Keep /api/status live by collecting in-process from here on
+            logger.error("Collector process exited; collecting in-process")
+            if self._collector is not None:
+                self._collector.terminate()
+                self._collector = None
+            psutil.cpu_percent(interval=None)
+            self._monitor_loop()
     
     def _update_system_metrics(self):
         """Update system resource metrics"""
-        global system_metrics
-        
         try:
             # CPU and Memory
-            cpu_percent = psutil.cpu_percent(interval=1)
+            cpu_percent = psutil.cpu_percent(interval=None)  # since last call, non-blocking
             memory = psutil.virtual_memory()
-            disk = psutil.disk_usage('/')
+            disk = cached_disk_usage('/')
             
-            # Docker container stats
+            # Docker container stats, refilled into the same list
             docker_stats = self._get_docker_stats()
+            system_metrics['docker'].clear()
+            system_metrics['docker'].extend(docker_stats)
             
-            system_metrics = {
-                'timestamp': datetime.now().isoformat(),
-                'cpu': {
-                    'percent': cpu_percent,
-                    'count': psutil.cpu_count()
-                },
-                'memory': {
-                    'total': memory.total,
-                    'used': memory.used,
-                    'percent': memory.percent,
-                    'available': memory.available
-                },
-                'disk': {
-                    'total': disk.total,
-                    'used': disk.used,
-                    'percent': (disk.used / disk.total) * 100,
-                    'free': disk.free
-                },
-                'docker': docker_stats,
-                'load_average': os.getloadavg() if hasattr(os, 'getloadavg') else [0, 0, 0]
-            }
+            system_metrics['timestamp'] = datetime.now().isoformat()
+            system_metrics['cpu']['percent'] = cpu_percent
+            
+            memory_metrics = system_metrics['memory']
+            memory_metrics['total'] = memory.total
+            memory_metrics['used'] = memory.used
+            memory_metrics['percent'] = memory.percent
+            memory_metrics['available'] = memory.available
+            
+            disk_metrics = system_metrics['disk']
+            disk_metrics['total'] = disk.total
+            disk_metrics['used'] = disk.used
+            disk_metrics['percent'] = (disk.used / disk.total) * 100
+            disk_metrics['free'] = disk.free
+            
+            if hasattr(os, 'getloadavg'):
+                system_metrics['load_average'] = os.getloadavg()
             
         except Exception as e:
             logger.error(f"Error updating system metrics: {e}")
             
+    def _docker_get(self, path):
+        """GET a Docker Engine API path and decode the JSON body"""
+        for attempt in range(2):
+            conn = getattr(self._docker_local, 'conn', None)
+            if conn is None:
+                conn = self._docker_local.conn = DockerSocketConnection(MONITOR_CONFIG['docker_socket'])
+            try:
+                conn.request('GET', path)
+                response = conn.getresponse()
+                body = response.read()
+                if response.status != 200:
+                    raise http.client.HTTPException(f"{path} returned {response.status}")
+                return orjson.loads(body) if HAS_ORJSON else json.loads(body)
+            except (OSError, http.client.HTTPException):
+                # Stale keep-alive connection: reconnect once before giving up
+                conn.close()
+                self._docker_local.conn = None
+                if attempt:
+                    raise
+    
+    def _container_stats(self, container):
+        """Fetch one container's stats and format them like `docker stats`"""
+        cid = container['Id']
+        stats = self._docker_get(f"/containers/{cid}/stats?stream=false&one-shot=true")
+        
+        # one-shot stats carry no previous sample, so diff against the last tick ourselves
+        cpu = stats.get('cpu_stats', {})
+        cpu_total = cpu.get('cpu_usage', {}).get('total_usage', 0)
+        system_total = cpu.get('system_cpu_usage', 0)
+        prev = self._docker_prev.get(cid)
+        self._docker_prev[cid] = (cpu_total, system_total)
+        cpu_percent = 0.0
+        if prev and system_total > prev[1]:
+            cpu_percent = (cpu_total - prev[0]) / (system_total - prev[1]) * cpu.get('online_cpus', 1) * 100
+        
+        memory = stats.get('memory_stats', {})
+        mem_stats = memory.get('stats', {})
+        mem_used = memory.get('usage', 0) - mem_stats.get('inactive_file', mem_stats.get('total_inactive_file', 0))
+        mem_limit = memory.get('limit', 0)
+        
+        networks = (stats.get('networks') or {}).values()
+        rx = sum(n.get('rx_bytes', 0) for n in networks)
+        tx = sum(n.get('tx_bytes', 0) for n in networks)
+        
+        block = stats.get('blkio_stats', {}).get('io_service_bytes_recursive') or []
+        read = sum(b.get('value', 0) for b in block if b.get('op', '').lower() == 'read')
+        write = sum(b.get('value', 0) for b in block if b.get('op', '').lower() == 'write')
+        
+        return {
+            'name': cid[:12],
+            'cpu': f"{cpu_percent:.2f}%",
+            'memory_usage': f"{_format_bytes(mem_used, binary=True)} / {_format_bytes(mem_limit, binary=True)}",
+            'memory_percent': f"{(mem_used / mem_limit * 100) if mem_limit else 0:.2f}%",
+            'network': f"{_format_bytes(rx)} / {_format_bytes(tx)}",
+            'block_io': f"{_format_bytes(read)} / {_format_bytes(write)}"
+        }
+    
     def _get_docker_stats(self):
-        """Get Docker container statistics"""
+        """Get Docker container statistics from the Engine API"""
+        if not os.path.exists(MONITOR_CONFIG['docker_socket']):
+            return []
+        
         try:
-            result = subprocess.run(['docker', 'stats', '--no-stream', '--format', 
-                                   'table {{.Container}}\t{{.CPUPerc}}\t{{.MemUsage}}\t{{.MemPerc}}\t{{.NetIO}}\t{{.BlockIO}}'],
-                                  capture_output=True, text=True, timeout=10)
+            listing = self._docker_get('/containers/json')
+            containers = list(self._io_pool.map(self._container_stats, listing))
             
-            if result.returncode == 0:
-                lines = result.stdout.strip().split('\n')
-                containers = []
-                
-                for line in lines[1:]:  # Skip header
-                    parts = line.split('\t')
-                    if len(parts) >= 6:
-                        containers.append({
-                            'name': parts[0],
-                            'cpu': parts[1],
-                            'memory_usage': parts[2],
-                            'memory_percent': parts[3],
-                            'network': parts[4],
-                            'block_io': parts[5]
-                        })
-                
-                return containers
+            live = {c['Id'] for c in listing}
+            for cid in [cid for cid in self._docker_prev if cid not in live]:
+                del self._docker_prev[cid]
+            
+            return containers
                 
         except Exception as e:
             logger.error(f"Error getting Docker stats: {e}")
@@ -152,89 +520,182 @@ class WorkflowMonitor:
         """Check status of active Nextflow workflows"""
         global workflow_status
         
-        # Check for Nextflow processes
+        # Check for Nextflow processes; only matches pay for the detailed reads
         nextflow_processes = []
-        for proc in psutil.process_iter(['pid', 'name', 'cmdline', 'create_time', 'cpu_percent', 'memory_percent']):
+        seen_pids = set()
+        for proc in psutil.process_iter(['pid', 'name']):
             try:
-                if 'nextflow' in proc.info['name'].lower() or any('nextflow' in str(cmd).lower() for cmd in proc.info['cmdline']):
+                name = (proc.info['name'] or '').lower()
+                # Nextflow runs inside a JVM or shell; only those need their cmdline checked
+                if 'nextflow' not in name and name not in NEXTFLOW_HOST_NAMES:
+                    continue
+                
+                pid = proc.info['pid']
+                # Keep the same Process across ticks so cpu_percent() measures a real interval
+                p, started = self._nextflow_procs.get(pid, (proc, None))
+                # One oneshot() per candidate: stat/status are parsed once for all reads
+                with p.oneshot():
+                    cmdline = p.cmdline()
+                    if 'nextflow' not in name and 'nextflow' not in ' '.join(cmdline).lower():
+                        continue
+                    if started is None:
+                        started = datetime.fromtimestamp(p.create_time()).isoformat()
+                    self._nextflow_procs[pid] = (p, started)
+                    seen_pids.add(pid)
                     nextflow_processes.append({
-                        'pid': proc.info['pid'],
-                        'cmdline': ' '.join(proc.info['cmdline'][:3]) + '...' if len(proc.info['cmdline']) > 3 else ' '.join(proc.info['cmdline']),
-                        'started': datetime.fromtimestamp(proc.info['create_time']).isoformat(),
-                        'cpu_percent': proc.info['cpu_percent'],
-                        'memory_percent': proc.info['memory_percent'],
+                        'pid': pid,
+                        'cmdline': ' '.join(cmdline[:3]) + '...' if len(cmdline) > 3 else ' '.join(cmdline),
+                        'started': started,
+                        'cpu_percent': p.cpu_percent(),
+                        'memory_percent': p.memory_percent(),
                         'status': 'running'
                     })
             except (psutil.NoSuchProcess, psutil.AccessDenied):
                 continue
         
+        # Forget processes that have exited
+        for pid in [pid for pid in self._nextflow_procs if pid not in seen_pids]:
+            del self._nextflow_procs[pid]
+        
         # Update workflow status
         workflow_status['nextflow_processes'] = nextflow_processes
         workflow_status['active_count'] = len(nextflow_processes)
         
-        # Check for work directories
+        # Check for work directories; sizes are walked concurrently (syscall-bound)
         work_dirs = []
+        self._dirs_seen.clear()
         if Path(MONITOR_CONFIG['work_dir']).exists():
-            for work_path in Path(MONITOR_CONFIG['work_dir']).glob('*'):
-                if work_path.is_dir():
-                    work_dirs.append({
-                        'name': work_path.name,
-                        'path': str(work_path),
-                        'created': datetime.fromtimestamp(work_path.stat().st_ctime).isoformat(),
-                        'size': self._get_dir_size(work_path)
-                    })
+            work_paths = [p for p in Path(MONITOR_CONFIG['work_dir']).glob('*') if p.is_dir()]
+            sizes = self._io_pool.map(self._get_dir_size, work_paths)
+            for work_path, size in zip(work_paths, sizes):
+                work_dirs.append({
+                    'name': work_path.name,
+                    'path': str(work_path),
+                    'created': datetime.fromtimestamp(work_path.stat().st_ctime).isoformat(),
+                    'size': size
+                })
+        
+        # Drop cached sizes for directories that no longer exist
+        for path in [p for p in _dirsize_cache if p not in self._dirs_seen]:
+            del _dirsize_cache[path]
         
         workflow_status['work_directories'] = work_dirs
         
     def _get_dir_size(self, path):
-        """Get directory size in bytes"""
-        try:
-            total = 0
-            for entry in os.scandir(path):
-                if entry.is_file(follow_symlinks=False):
-                    total += entry.stat().st_size
-                elif entry.is_dir(follow_symlinks=False):
-                    total += self._get_dir_size(entry.path)
-            return total
-        except (OSError, PermissionError):
-            return 0
+        """Get directory size in bytes, reusing listings of settled directories
+
+        Appending to a file leaves its directory's mtime alone, so only the
+        listing is cached; every file is still stat'ed on each call.
+        """
+        total = 0
+        stack = [os.fspath(path)]
+        settled_ns = time.time_ns() - MONITOR_CONFIG['dirsize_settle_seconds'] * 10**9
+        while stack:
+            current = stack.pop()
+            try:
+                mtime_ns = os.stat(current).st_mtime_ns
+                cached = _dirsize_cache.get(current)
+                if cached is not None and cached[0] == mtime_ns and mtime_ns < settled_ns:
+                    _, files, subdirs = cached
+                else:
+                    files, subdirs = [], []
+                    with os.scandir(current) as it:
+                        for entry in it:
+                            if entry.is_file(follow_symlinks=False):
+                                files.append(entry.path)
+                            elif entry.is_dir(follow_symlinks=False):
+                                subdirs.append(entry.path)
+                    _dirsize_cache[current] = (mtime_ns, files, subdirs)
+            except (OSError, PermissionError):
+                continue
+            files_size = 0
+            for file_path in files:
+                try:
+                    files_size += os.lstat(file_path).st_size
+                except OSError:
+                    pass  # removed since the listing was cached
+            self._dirs_seen.add(current)
+            total += files_size
+            stack.extend(subdirs)
+        return total
     
     def _update_file_status(self):
         """Monitor input/output file changes"""
         global active_processes
         
+        # Unwatched directories (no watchdog, or created later) fall back to a rescan
+        for index in (self.data_index, self.output_index):
+            if not index.watched:
+                index.rescan()
+        
         file_stats = {}
         
         # Check data directory
-        if Path(MONITOR_CONFIG['data_dir']).exists():
-            csv_files = list(Path(MONITOR_CONFIG['data_dir']).glob('*.csv'))
+        if os.path.isdir(self.data_index.root):
+            csv_files = self.data_index.snapshot()
             file_stats['input_files'] = {
                 'count': len(csv_files),
-                'total_size': sum(f.stat().st_size for f in csv_files if f.exists()),
-                'files': [{'name': f.name, 'size': f.stat().st_size, 'modified': datetime.fromtimestamp(f.stat().st_mtime).isoformat()} for f in csv_files[:5]]
+                'total_size': sum(size for size, _ in csv_files.values()),
+                'files': [
+                    {'name': os.path.basename(path), 'size': size, 'modified': datetime.fromtimestamp(mtime).isoformat()}
+                    for path, (size, mtime) in itertools.islice(csv_files.items(), 5)
+                ]
             }
         
         # Check outputs directory
-        if Path(MONITOR_CONFIG['outputs_dir']).exists():
-            output_files = list(Path(MONITOR_CONFIG['outputs_dir']).rglob('*'))
-            output_files = [f for f in output_files if f.is_file()]
+        if os.path.isdir(self.output_index.root):
+            output_files = self.output_index.snapshot()
             
             file_stats['output_files'] = {
                 'count': len(output_files),
-                'total_size': sum(f.stat().st_size for f in output_files if f.exists()),
+                'total_size': sum(size for size, _ in output_files.values()),
                 'recent_files': [
                     {
-                        'name': f.name, 
-                        'path': str(f.relative_to(Path(MONITOR_CONFIG['outputs_dir']))),
-                        'size': f.stat().st_size, 
-                        'modified': datetime.fromtimestamp(f.stat().st_mtime).isoformat()
+                        'name': os.path.basename(path), 
+                        'path': os.path.relpath(path, self.output_index.root),
+                        'size': size, 
+                        'modified': datetime.fromtimestamp(mtime).isoformat()
                     } 
-                    for f in sorted(output_files, key=lambda x: x.stat().st_mtime, reverse=True)[:10]
+                    for path, (size, mtime) in self.output_index.recent(10)
                 ]
             }
         
         active_processes['file_stats'] = file_stats
 
+def _merge_into(target, source):
+    """Copy a snapshot into target, updating nested dicts and lists in place"""
+    for key, value in source.items():
+        current = target.get(key)
+        if isinstance(current, dict) and isinstance(value, dict):
+            current.update(value)
+        elif isinstance(current, list) and isinstance(value, list):
+            current[:] = value
+        else:
+            target[key] = value
+
+def _collector_main(conn, config):
+    """Collector process: gather metrics every interval and send them to the server"""
+    MONITOR_CONFIG.update(config)
+    collector = WorkflowMonitor()
+    collector.running = True
+    psutil.cpu_percent(interval=None)  # prime the counters for non-blocking reads
+    collector._start_watching()
+    while True:
+        try:
+            collector._collect()
+            conn.send_bytes(dumps({
+                'system': system_metrics,
+                'workflows': workflow_status,
+                'processes': active_processes
+            }).encode())
+        except (BrokenPipeError, EOFError):
+            break  # the server has gone away
+        except Exception as e:
+            logger.error(f"Monitor error: {e}")
+            time.sleep(10)
+            continue
+        time.sleep(MONITOR_CONFIG['monitor_interval'])
+
 # Initialize monitor
 monitor = WorkflowMonitor()
 
@@ -243,42 +704,66 @@ def dashboard():
     """Main monitoring dashboard"""
     return render_template('monitor.html')
 
-@app.route('/api/status')
+@app.route('/api/status', provide_automatic_options=False)
 def get_status():
-    """Get current system and workflow status"""
-    return jsonify({
-        'system': system_metrics,
-        'workflows': workflow_status,
-        'processes': active_processes,
-        'timestamp': datetime.now().isoformat()
-    })
+    """Get current system and workflow status, reusing the tick's serialized payload"""
+    payload, _ = serialize_status(max_age=MONITOR_CONFIG['monitor_interval'])
+    resp = app.response_class(payload, mimetype='application/json')
+    # Content digest, so tags survive restarts and agree across workers (str hashes are salted)
+    resp.set_etag(hashlib.blake2b(payload.encode(), digest_size=8).hexdigest())
+    resp.headers['Cache-Control'] = 'max-age=1'
+    return resp.make_conditional(request)
+
+# Workflow report summaries keyed by path -> ((size, mtime), summary)
+_report_cache = {}
+
+def report_summary(path, stamp):
+    """Summary fields of a workflow report, re-parsed only when (size, mtime) changes"""
+    cached = _report_cache.get(path)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    with open(path, 'rb') as f:
+        report_data = orjson.loads(f.read()) if HAS_ORJSON else json.load(f)
+    report_file = Path(path)
+    summary = {
+        'name': report_file.stem,
+        'file': report_file.name,
+        'completed': datetime.fromtimestamp(stamp[1]).isoformat(),
+        'dataset': report_data.get('dataset', 'Unknown'),
+        'variables': len(report_data.get('results', {})),
+        'status': 'completed'
+    }
+    _report_cache[path] = (stamp, summary)
+    return summary
 
 @app.route('/api/workflows')
 def get_workflows():
     """Get detailed workflow information"""
     workflows = []
     
-    # Check for recent workflow reports
-    if Path(MONITOR_CONFIG['outputs_dir']).exists():
-        report_files = list(Path(MONITOR_CONFIG['outputs_dir']).glob('*_report.json'))
+    # Check for recent workflow reports, read from the output file index
+    index = monitor.output_index
+    if os.path.isdir(index.root):
+        if not index.watched:
+            index.rescan()
+        report_files = [
+            (path, stamp) for path, stamp in index.snapshot().items()
+            if path.endswith('_report.json') and os.path.dirname(path) == index.root
+        ]
         
-        for report_file in sorted(report_files, key=lambda x: x.stat().st_mtime, reverse=True)[:10]:
+        recent = heapq.nlargest(10, report_files, key=lambda item: item[1][1])
+        for path, stamp in recent:
             try:
-                with open(report_file) as f:
-                    report_data = json.load(f)
-                
-                workflows.append({
-                    'name': report_file.stem,
-                    'file': report_file.name,
-                    'completed': datetime.fromtimestamp(report_file.stat().st_mtime).isoformat(),
-                    'dataset': report_data.get('dataset', 'Unknown'),
-                    'variables': len(report_data.get('results', {})),
-                    'status': 'completed'
-                })
+                workflows.append(report_summary(path, stamp))
             except Exception as e:
-                logger.error(f"Error reading report {report_file}: {e}")
+                logger.error(f"Error reading report {path}: {e}")
+        
+        # Keep summaries only for reports still listed
+        live = {path for path, _ in recent}
+        for path in [p for p in _report_cache if p not in live]:
+            _report_cache.pop(path, None)
     
-    return jsonify({
+    return json_response({
         'workflows': workflows,
         'active_count': workflow_status.get('active_count', 0)
     })
@@ -286,10 +771,10 @@ def get_workflows():
 @app.route('/api/system')
 def get_system_info():
     """Get detailed system information"""
-    return jsonify({
+    return json_response({
         'system': system_metrics,
         'config': MONITOR_CONFIG,
-        'uptime': time.time() - psutil.boot_time()
+        'uptime': time.time() - _BOOT_TIME
     })
 
 @app.route('/api/logs')
@@ -299,34 +784,37 @@ def get_logs():
     
     # Check for log files in work directories
     if Path(MONITOR_CONFIG['work_dir']).exists():
-        log_files = list(Path(MONITOR_CONFIG['work_dir']).rglob('*.log'))
+        # Stat each log once and reuse it for sorting, size and mtime
+        log_files = []
+        for log_file in Path(MONITOR_CONFIG['work_dir']).rglob('*.log'):
+            try:
+                log_files.append((log_file, log_file.stat()))
+            except OSError:
+                continue
         
-        for log_file in sorted(log_files, key=lambda x: x.stat().st_mtime, reverse=True)[:5]:
+        for log_file, st in heapq.nlargest(5, log_files, key=lambda item: item[1].st_mtime):
             try:
-                with open(log_file) as f:
-                    content = f.read()[-1000:]  # Last 1000 characters
+                # Read only the tail instead of the whole file
+                with open(log_file, 'rb') as f:
+                    f.seek(max(0, st.st_size - LOG_TAIL_BYTES))
+                    content = f.read(LOG_TAIL_BYTES).decode('utf-8', errors='replace')
                 
                 logs.append({
                     'file': str(log_file.relative_to(Path(MONITOR_CONFIG['work_dir']))),
-                    'modified': datetime.fromtimestamp(log_file.stat().st_mtime).isoformat(),
-                    'size': log_file.stat().st_size,
+                    'modified': datetime.fromtimestamp(st.st_mtime).isoformat(),
+                    'size': st.st_size,
                     'content': content
                 })
             except Exception as e:
                 logger.error(f"Error reading log {log_file}: {e}")
     
-    return jsonify({'logs': logs})
+    return json_response({'logs': logs})
 
 @socketio.on('connect')
 def on_connect():
     """Handle client connection"""
     logger.info("Client connected to monitor")
-    emit('status_update', {
-        'system': system_metrics,
-        'workflows': workflow_status,
-        'processes': active_processes,
-        'timestamp': datetime.now().isoformat()
-    })
+    emit('status_update', serialize_status(max_age=1.0)[0])
 
 @socketio.on('disconnect')
 def on_disconnect():
@@ -335,13 +823,8 @@ def on_disconnect():
 
 @socketio.on('request_update')
 def on_request_update():
-    """Handle manual update request"""
-    emit('status_update', {
-        'system': system_metrics,
-        'workflows': workflow_status,
-        'processes': active_processes,
-        'timestamp': datetime.now().isoformat()
-    })
+    """Handle manual update request, debounced to the last second's payload"""
+    emit('status_update', serialize_status(max_age=1.0)[0])
 
 if __name__ == '__main__':
     # Start monitoring
@@ -7,20 +7,177 @@ This script performs daily spatial interpolation for each variable and creates g
 import pandas as pd
 import numpy as np
 from pykrige.ok import OrdinaryKriging
+from scipy.spatial import cKDTree
 from scipy.spatial.distance import cdist
 from scipy.interpolate import Rbf
 import rasterio
 from rasterio.transform import from_bounds
 from rasterio.crs import CRS
+import matplotlib
+matplotlib.use('Agg')  # headless: no GUI backend to initialize
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
 import json
+import multiprocessing
 import os
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
 from glob import glob
 import warnings
 warnings.filterwarnings('ignore')
 
+try:
+    from pykrige.lib.cok import _c_exec_loop  # noqa: F401
+    KRIGING_BACKEND = 'C'
+except ImportError:
+    KRIGING_BACKEND = 'vectorized'
+
+try:
+    from numba import njit, prange
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+if HAS_NUMBA:
+    @njit(parallel=True, fastmath=True, cache=True, error_model='numpy')
+    def _idw(grid_lon, grid_lat, cx, cy, v, power=2.0):
+        """IDW streamed over flattened grid cells, never materializing the distance matrix"""
+        out = np.empty(grid_lon.shape[0])
+        half_power = power / 2.0
+        for i in prange(grid_lon.shape[0]):
+            gx = grid_lon[i]
+            gy = grid_lat[i]
+            num = 0.0
+            den = 0.0
+            for k in range(v.shape[0]):
+                d2 = max((gx - cx[k]) ** 2 + (gy - cy[k]) ** 2, 1e-20)
+                w = 1.0 / d2 if power == 2.0 else d2 ** -half_power
+                num += w * v[k]
+                den += w
+            out[i] = num / den
+        return out
+
+# Band-interleaved 256x256 tiles with the floating-point predictor, for every GeoTIFF written here
+GEOTIFF_OPTIONS = {
+    'tiled': True,
+    'interleave': 'band',
+    'blockxsize': 256,
+    'blockysize': 256,
+    'compress': 'lzw',
+    'predictor': 3,
+    'BIGTIFF': 'IF_SAFER'
+}
+
+# Storage type per variable; int16 bands carry a GDAL scale/offset so reads decode them
+OUTPUT_DTYPES = {'NDVI': 'int16', 'pm25': 'int16', 'RH': 'int16'}
+INT16_NODATA = -32768
+
+def quantize(cube):
+    """Scale a float cube onto int16 over its finite range; returns (data, scale, offset)"""
+    valid = np.isfinite(cube)
+    vmin, vmax = (float(cube[valid].min()), float(cube[valid].max())) if valid.any() else (0.0, 0.0)
+    scale = (vmax - vmin) / 65534 or 1.0
+    offset = (vmax + vmin) / 2
+    data = np.full(cube.shape, INT16_NODATA, dtype=np.int16)
+    data[valid] = np.round((cube[valid] - offset) / scale)
+    return data, scale, offset
+
+def read_band(src, band, window=None):
+    """Read a band as float32 with NaN for nodata, applying its scale/offset"""
+    data = src.read(band, window=window, masked=True).astype(np.float32)
+    data = data * np.float32(src.scales[band - 1]) + np.float32(src.offsets[band - 1])
+    return data.filled(np.nan)
+
+def is_constant(values, eps=1e-9):
+    """True when a day's samples carry no spatial variation to interpolate"""
+    return float(np.std(values)) < eps
+
+def perform_interpolation(coords, values, grid_lon, grid_lat, settings):
+    """Interpolate one day's samples onto the grid; returns None on failure"""
+    if is_constant(values):
+        # Nothing to fit: the variogram would be degenerate, the surface is flat
+        return np.full((len(grid_lat), len(grid_lon)), np.mean(values), dtype=np.float32)
+    grid_lon_2d, grid_lat_2d = np.meshgrid(grid_lon, grid_lat)
+    try:
+        if settings['method'] == 'kriging':
+            ok = OrdinaryKriging(
+                coords[:, 0], coords[:, 1], values,
+                variogram_model=settings['variogram_model'],
+                variogram_parameters=settings['variogram_parameters'],
+                verbose=False,
+                enable_plotting=False,
+                enable_statistics=False
+            )
+            if len(values) >= settings['moving_window_min']:
+                # Moving window: each cell solves a small system over its nearest points
+                # (moving window needs 'C' or 'loop'; 'vectorized' is global only)
+                window_backend = 'C' if KRIGING_BACKEND == 'C' else 'loop'
+                z, ss = ok.execute('grid', grid_lon, grid_lat, backend=window_backend,
+                                   n_closest_points=settings['moving_window_points'])
+            else:
+                z, ss = ok.execute('grid', grid_lon, grid_lat, backend=KRIGING_BACKEND)
+            return z
+        elif settings['method'] == 'rbf':
+            rbf = Rbf(coords[:, 0], coords[:, 1], values, function='multiquadric')
+            z = rbf(grid_lon_2d, grid_lat_2d)
+            return z
+        elif settings['method'] == 'idw':
+            if HAS_NUMBA:
+                z = _idw(grid_lon_2d.ravel(), grid_lat_2d.ravel(),
+                         np.ascontiguousarray(coords[:, 0], dtype=np.float64),
+                         np.ascontiguousarray(coords[:, 1], dtype=np.float64),
+                         np.asarray(values, dtype=np.float64))
+                return z.reshape(grid_lon_2d.shape)
+            # Inverse Distance Weighting, all grid cells in one distance matrix
+            grid_pts = np.column_stack([grid_lon_2d.ravel(), grid_lat_2d.ravel()])
+            D = cdist(grid_pts, coords)
+            np.maximum(D, 1e-10, out=D)
+            W = D ** -2
+            z = (W @ values) / W.sum(axis=1)
+            return z.reshape(grid_lon_2d.shape)
+        elif settings['method'] == 'idw_knn':
+            # IDW over each cell's k nearest samples only, via a multithreaded KD-tree query
+            grid_pts = np.column_stack([grid_lon_2d.ravel(), grid_lat_2d.ravel()])
+            k = min(settings['idw_neighbors'], len(values))
+            d, idx = cKDTree(coords).query(grid_pts, k=k, workers=-1)
+            if k == 1:
+                d, idx = d[:, None], idx[:, None]
+            w = np.maximum(d, 1e-10) ** -2
+            z = (w * values[idx]).sum(axis=1) / w.sum(axis=1)
+            return z.reshape(grid_lon_2d.shape)
+    except Exception as e:
+        print(f"    ❌ Interpolation error: {e}")
+        return None
+
+def _process_day(date, coords, values, grid_lon, grid_lat, settings):
+    """Interpolate one day in a pool worker; returns (date, float32 surface or None, trivial)"""
+    z = perform_interpolation(coords, values, grid_lon, grid_lat, settings)
+    return date, (None if z is None else np.asarray(z, dtype=np.float32)), is_constant(values)
+
+def load_uganda_rows(input_csv):
+    """Uganda rows of the daily CSV with parsed dates, cached as Parquet beside the CSV"""
+    cache_file = os.path.splitext(input_csv)[0] + '.uganda.parquet'
+    if os.path.exists(cache_file) and os.path.getmtime(cache_file) >= os.path.getmtime(input_csv):
+        try:
+            return pd.read_parquet(cache_file)
+        except Exception:
+            pass  # unreadable cache, rebuild it from the CSV
+    
+    dtypes = {'country': 'category', 'lat': 'float32', 'lon': 'float32'}
+    try:
+        df = pd.read_csv(input_csv, engine='pyarrow', dtype=dtypes)
+    except (ImportError, ValueError):
+        df = pd.read_csv(input_csv, dtype=dtypes)
+    
+    uganda_df = df[df['country'] == 'Uganda'].copy()
+    uganda_df['date'] = pd.to_datetime(uganda_df['date'], dayfirst=True, errors='coerce')
+    
+    try:
+        uganda_df.to_parquet(cache_file, index=False)
+    except Exception:
+        pass  # read-only data directory or no Parquet engine; the CSV still works
+    return uganda_df
+
 def run_enhanced_uganda_analysis():
     """Main function for enhanced Uganda spatial analysis"""
     
@@ -38,6 +195,10 @@ def run_enhanced_uganda_analysis():
     grid_resolution = 0.005  # degrees
     variogram_model = 'spherical'
     buffer_percent = 0.2
+    moving_window_points = 50  # kriging neighbours per grid cell
+    moving_window_min = 100  # below this many daily points, krige globally
+    idw_neighbors = 8  # samples per grid cell for 'idw_knn'
+    write_daily_files = False  # also write one single-band GeoTIFF per day
     
     # Create output directory
     os.makedirs(output_dir, exist_ok=True)
@@ -50,11 +211,7 @@ def run_enhanced_uganda_analysis():
     # Step 1: Load and prepare Uganda data
     print(f"\n📊 Step 1: Loading Uganda data...")
     try:
-        df = pd.read_csv(input_csv)
-        print(f"✅ Loaded {len(df)} total records")
-        
-        # Filter for Uganda
-        uganda_df = df[df['country'] == 'Uganda'].copy()
+        uganda_df = load_uganda_rows(input_csv)
         print(f"🇺🇬 Uganda records: {len(uganda_df)}")
         
         # Check available variables
@@ -70,8 +227,7 @@ def run_enhanced_uganda_analysis():
         uganda_clean = uganda_df[cols_to_keep].copy()
         uganda_clean = uganda_clean.dropna(subset=['lat', 'lon'])
         
-        # Convert date with flexible parsing
-        uganda_clean['date'] = pd.to_datetime(uganda_clean['date'], dayfirst=True, errors='coerce')
+        # Dates were parsed on load (dayfirst); drop the ones that failed
         uganda_clean = uganda_clean.dropna(subset=['date'])  # Remove invalid dates
         
         print(f"📍 Cleaned dataset: {len(uganda_clean)} records")
@@ -91,276 +247,297 @@ def run_enhanced_uganda_analysis():
         'variables_processed': [],
         'processing_results': {}
     }
+    band_catalog = []
     
-    for var_idx, variable in enumerate(available_vars, 1):
-        print(f"\n🔍 Processing variable {var_idx}/{len(available_vars)}: {variable}")
-        
-        # Get valid data for this variable
-        valid_data = uganda_clean.dropna(subset=[variable]).copy()
-        
-        if len(valid_data) < 10:
-            print(f"  ⚠️ Insufficient data for {variable}: {len(valid_data)} points")
-            continue
-        
-        print(f"  📊 Valid data points: {len(valid_data)}")
-        
-        # Get spatial extent
-        lat_min, lat_max = valid_data['lat'].min(), valid_data['lat'].max()
-        lon_min, lon_max = valid_data['lon'].min(), valid_data['lon'].max()
-        
-        lat_buffer = (lat_max - lat_min) * buffer_percent
-        lon_buffer = (lon_max - lon_min) * buffer_percent
-        
-        # Create interpolation grid
-        n_lat = int((lat_max - lat_min + 2*lat_buffer) / grid_resolution) + 1
-        n_lon = int((lon_max - lon_min + 2*lon_buffer) / grid_resolution) + 1
-        
-        # Limit grid size for performance
-        n_lat = min(n_lat, 400)
-        n_lon = min(n_lon, 400)
-        
-        grid_lat = np.linspace(lat_min - lat_buffer, lat_max + lat_buffer, n_lat)
-        grid_lon = np.linspace(lon_min - lon_buffer, lon_max + lon_buffer, n_lon)
-        grid_lon_2d, grid_lat_2d = np.meshgrid(grid_lon, grid_lat)
-        
-        print(f"  📏 Grid dimensions: {n_lat} x {n_lon} = {n_lat*n_lon:,} cells")
-        
-        # Get unique dates
-        dates = sorted(valid_data['date'].dt.date.unique())
-        selected_dates = dates[:max_days_per_variable]
-        
-        print(f"  📅 Processing {len(selected_dates)} days (out of {len(dates)} available)")
-        
-        # Initialize tracking
-        interpolation_log = {
-            'variable': variable,
-            'successful_interpolations': 0,
-            'failed_interpolations': 0,
-            'daily_files': []
-        }
-        
-        daily_raster_files = []
-        
-        # Define interpolation function
-        def perform_interpolation(coords, values):
-            try:
-                if interpolation_method == 'kriging':
-                    ok = OrdinaryKriging(
-                        coords[:, 0], coords[:, 1], values,
-                        variogram_model=variogram_model,
-                        verbose=False,
-                        enable_plotting=False
-                    )
-                    z, ss = ok.execute('grid', grid_lon, grid_lat)
-                    return z
-                elif interpolation_method == 'rbf':
-                    rbf = Rbf(coords[:, 0], coords[:, 1], values, function='multiquadric')
-                    z = rbf(grid_lon_2d, grid_lat_2d)
-                    return z
-                elif interpolation_method == 'idw':
-                    # Inverse Distance Weighting
-                    z = np.zeros_like(grid_lon_2d)
-                    for i in range(len(grid_lat)):
-                        for j in range(len(grid_lon)):
-                            distances = cdist([(grid_lon[j], grid_lat[i])], coords)[0]
-                            distances[distances == 0] = 1e-10
-                            weights = 1 / (distances ** 2)
-                            z[i, j] = np.sum(weights * values) / np.sum(weights)
-                    return z
-            except Exception as e:
-                print(f"    ❌ Interpolation error: {e}")
-                return None
-        
-        # Process each day
-        for day_idx, date in enumerate(selected_dates):
-            try:
-                date_str = str(date)
-                daily_data = valid_data[valid_data['date'].dt.date == date]
+    # One 2x3 figure, cleared and redrawn for each variable's maps
+    fig, axes = plt.subplots(2, 3, figsize=(18, 12))
+    axes = axes.flatten()
+    colorbars = []
+    
+    # Spawned rather than forked so workers do not inherit GDAL or Numba thread state
+    with ProcessPoolExecutor(max_workers=os.cpu_count(), mp_context=multiprocessing.get_context('spawn')) as pool:
+        for var_idx, variable in enumerate(available_vars, 1):
+            print(f"\n🔍 Processing variable {var_idx}/{len(available_vars)}: {variable}")
+            
+            # Get valid data for this variable
+            valid_data = uganda_clean.dropna(subset=[variable]).copy()
+            
+            if len(valid_data) < 10:
+                print(f"  ⚠️ Insufficient data for {variable}: {len(valid_data)} points")
+                continue
+            
+            print(f"  📊 Valid data points: {len(valid_data)}")
+            
+            # Get spatial extent
+            lat_min, lat_max = valid_data['lat'].min(), valid_data['lat'].max()
+            lon_min, lon_max = valid_data['lon'].min(), valid_data['lon'].max()
+            
+            lat_buffer = (lat_max - lat_min) * buffer_percent
+            lon_buffer = (lon_max - lon_min) * buffer_percent
+            
+            # Create interpolation grid
+            n_lat = int((lat_max - lat_min + 2*lat_buffer) / grid_resolution) + 1
+            n_lon = int((lon_max - lon_min + 2*lon_buffer) / grid_resolution) + 1
+            
+            # Limit grid size for performance
+            n_lat = min(n_lat, 400)
+            n_lon = min(n_lon, 400)
+            
+            grid_lat = np.linspace(lat_min - lat_buffer, lat_max + lat_buffer, n_lat)
+            grid_lon = np.linspace(lon_min - lon_buffer, lon_max + lon_buffer, n_lon)
+            
+            # Georeferencing and write profile are the same for every day of this variable
+            transform = from_bounds(
+                grid_lon.min(), grid_lat.min(),
+                grid_lon.max(), grid_lat.max(),
+                len(grid_lon), len(grid_lat)
+            )
+            base_profile = dict(
+                driver='GTiff',
+                height=len(grid_lat), width=len(grid_lon),
+                dtype='float32',
+                crs=CRS.from_epsg(4326),
+                transform=transform,
+                **GEOTIFF_OPTIONS
+            )
+            
+            print(f"  📏 Grid dimensions: {n_lat} x {n_lon} = {n_lat*n_lon:,} cells")
+            
+            # Partition by date once; each day is then a dict lookup
+            daily_groups = {d: g for d, g in valid_data.groupby(valid_data['date'].dt.date, sort=False)}
+            
+            # Get unique dates
+            dates = sorted(daily_groups)
+            selected_dates = dates[:max_days_per_variable]
+            
+            print(f"  📅 Processing {len(selected_dates)} days (out of {len(dates)} available)")
+            
+            # Initialize tracking
+            interpolation_log = {
+                'variable': variable,
+                'successful_interpolations': 0,
+                'failed_interpolations': 0,
+                'trivial_interpolations': 0,
+                'daily_files': []
+            }
+            
+            # Fit the variogram once per variable, on its best-sampled day, and reuse it
+            cached_params = None
+            if interpolation_method == 'kriging':
+                fit_dates = [d for d in selected_dates if not is_constant(daily_groups[d][variable].to_numpy())]
+                fit_date = max(fit_dates, key=lambda d: len(daily_groups[d]), default=None)
+                if fit_date is not None and len(daily_groups[fit_date]) >= 5:
+                    fit_data = daily_groups[fit_date]
+                    try:
+                        ok = OrdinaryKriging(
+                            fit_data['lon'].to_numpy(), fit_data['lat'].to_numpy(), fit_data[variable].to_numpy(),
+                            variogram_model=variogram_model,
+                            verbose=False,
+                            enable_plotting=False
+                        )
+                        # Fitted values are [psill, range, nugget]; a list passed back would be read as
+                        # [sill, range, nugget], so hand them over by name
+                        cached_params = dict(zip(('psill', 'range', 'nugget'),
+                                                 (float(p) for p in ok.variogram_model_parameters)))
+                        print(f"  📐 Variogram parameters ({fit_date}): "
+                              f"{ {k: round(v, 4) for k, v in cached_params.items()} }")
+                    except Exception as e:
+                        print(f"  ⚠️ Variogram fit failed, fitting per day: {e}")
+            
+            settings = {
+                'method': interpolation_method,
+                'variogram_model': variogram_model,
+                'variogram_parameters': cached_params,
+                'moving_window_points': moving_window_points,
+                'moving_window_min': moving_window_min,
+                'idw_neighbors': idw_neighbors
+            }
+            
+            # Days are independent: interpolate them in parallel on the pool
+            day_futures = []
+            for day_idx, date in enumerate(selected_dates):
+                daily_data = daily_groups[date]
                 
                 if len(daily_data) < 5:
                     interpolation_log['failed_interpolations'] += 1
                     continue
                 
-                print(f"    📅 Day {day_idx+1}/{len(selected_dates)}: {date_str} ({len(daily_data)} points)")
+                print(f"    📅 Day {day_idx+1}/{len(selected_dates)}: {date} ({len(daily_data)} points)")
                 
                 # Prepare coordinates and values
-                coords = daily_data[['lon', 'lat']].values
-                values = daily_data[variable].values
-                
-                # Perform interpolation
-                z = perform_interpolation(coords, values)
-                
-                if z is None:
-                    interpolation_log['failed_interpolations'] += 1
-                    continue
-                
-                # Create GeoTIFF
-                transform = from_bounds(
-                    grid_lon.min(), grid_lat.min(),
-                    grid_lon.max(), grid_lat.max(),
-                    len(grid_lon), len(grid_lat)
-                )
-                
-                output_file = os.path.join(output_dir, f'uganda_{variable}_daily_{date_str}.tif')
-                
-                with rasterio.open(
-                    output_file, 'w',
-                    driver='GTiff',
-                    height=len(grid_lat), width=len(grid_lon),
-                    count=1, dtype=np.float32,
-                    crs=CRS.from_epsg(4326),
-                    transform=transform,
-                    compress='lzw'
-                ) as dst:
-                    dst.write(z.astype(np.float32), 1)
-                    dst.set_band_description(1, f'Uganda {variable} - {date_str}')
-                
-                daily_raster_files.append(output_file)
-                interpolation_log['successful_interpolations'] += 1
-                interpolation_log['daily_files'].append(output_file)
-                
-            except Exception as e:
-                print(f"    ❌ Error processing {date_str}: {e}")
-                interpolation_log['failed_interpolations'] += 1
-        
-        success_rate = (interpolation_log['successful_interpolations'] / len(selected_dates) * 100) if len(selected_dates) > 0 else 0
-        print(f"  ✅ Completed {variable}: {interpolation_log['successful_interpolations']}/{len(selected_dates)} days ({success_rate:.1f}% success)")
-        
-        # Step 3: Create variable geostack
-        if daily_raster_files:
-            print(f"  📚 Creating geostack for {variable}...")
-            
-            geostack_file = os.path.join(output_dir, f'uganda_{variable}_geostack.tif')
-            
-            # Read first raster for template
-            with rasterio.open(daily_raster_files[0]) as src:
-                profile = src.profile.copy()
-                profile.update({
-                    'count': len(daily_raster_files),
-                    'compress': 'lzw'
-                })
+                coords = daily_data[['lon', 'lat']].to_numpy()
+                values = daily_data[variable].to_numpy()
+                day_futures.append(pool.submit(_process_day, date, coords, values, grid_lon, grid_lat, settings))
             
-            # Create geostack
-            with rasterio.open(geostack_file, 'w', **profile) as dst:
-                for i, raster_file in enumerate(daily_raster_files, 1):
-                    date_str = os.path.basename(raster_file).split('_daily_')[-1].replace('.tif', '')
+            # Collect surfaces in date order into one (day, y, x) cube; the geostack is written from it
+            cube = np.empty((len(day_futures), len(grid_lat), len(grid_lon)), dtype=np.float32)
+            band_dates = []
+            for future in day_futures:
+                try:
+                    date, z, trivial = future.result()
                     
-                    with rasterio.open(raster_file) as src:
-                        data = src.read(1)
-                        dst.write(data, i)
-                        dst.set_band_description(i, f'{variable} - {date_str}')
-            
-            print(f"  ✅ Created geostack: {len(daily_raster_files)} bands")
-        
-        # Step 4: Create enhanced visualizations
-        if daily_raster_files:
-            print(f"  📈 Creating visualizations for {variable}...")
-            
-            # Read some sample rasters for visualization
-            sample_files = daily_raster_files[:min(6, len(daily_raster_files))]
+                    if z is None:
+                        interpolation_log['failed_interpolations'] += 1
+                        continue
+                    
+                    cube[len(band_dates)] = z
+                    band_dates.append(str(date))
+                    interpolation_log['successful_interpolations'] += 1
+                    if trivial:
+                        print(f"    ➖ {date}: constant values, wrote a flat surface")
+                        interpolation_log['trivial_interpolations'] += 1
+                    
+                except Exception as e:
+                    print(f"    ❌ Error processing day: {e}")
+                    interpolation_log['failed_interpolations'] += 1
             
-            fig, axes = plt.subplots(2, 3, figsize=(18, 12))
-            axes = axes.flatten()
+            cube = cube[:len(band_dates)]
             
-            # Calculate color scale
-            all_data = []
-            for raster_file in sample_files:
-                with rasterio.open(raster_file) as src:
-                    data = src.read(1)
-                    valid_data = data[~np.isnan(data)]
-                    if len(valid_data) > 0:
-                        all_data.extend(valid_data)
+            success_rate = (interpolation_log['successful_interpolations'] / len(selected_dates) * 100) if len(selected_dates) > 0 else 0
+            print(f"  ✅ Completed {variable}: {interpolation_log['successful_interpolations']}/{len(selected_dates)} days ({success_rate:.1f}% success)")
             
-            if all_data:
-                vmin, vmax = np.percentile(all_data, [2, 98])
+            if OUTPUT_DTYPES.get(variable) == 'int16':
+                data, scale, offset = quantize(cube)
+                profile = dict(base_profile, dtype='int16', predictor=2, nodata=INT16_NODATA)
             else:
-                vmin, vmax = 0, 1
+                data, scale, offset = cube, 1.0, 0.0
+                profile = base_profile
+            
+            # Optional single-day GeoTIFFs
+            if write_daily_files:
+                for date_str, z in zip(band_dates, data):
+                    output_file = os.path.join(output_dir, f'uganda_{variable}_daily_{date_str}.tif')
+                    
+                    with rasterio.open(output_file, 'w', count=1, **profile) as dst:
+                        dst.write(z, 1)
+                        dst.scales = (scale,)
+                        dst.offsets = (offset,)
+                        dst.set_band_description(1, f'Uganda {variable} - {date_str}')
+                    
+                    interpolation_log['daily_files'].append(output_file)
             
-            # Plot sample rasters
-            for i, raster_file in enumerate(sample_files):
-                date_str = os.path.basename(raster_file).split('_daily_')[-1].replace('.tif', '')
+            # Step 3: Create variable geostack
+            if band_dates:
+                print(f"  📚 Creating geostack for {variable}...")
                 
-                with rasterio.open(raster_file) as src:
-                    data = src.read(1)
-                    extent = [src.bounds.left, src.bounds.right, src.bounds.bottom, src.bounds.top]
+                geostack_name = f'uganda_{variable}_geostack.tif'
+                geostack_file = os.path.join(output_dir, geostack_name)
                 
-                im = axes[i].imshow(data, extent=extent, cmap='viridis', 
-                                  vmin=vmin, vmax=vmax, aspect='auto')
-                axes[i].set_title(f'{variable}\\n{date_str}', fontsize=11)
-                axes[i].set_xlabel('Longitude (°E)')
-                axes[i].set_ylabel('Latitude (°N)')
+                with rasterio.open(geostack_file, 'w', count=len(band_dates), **profile) as dst:
+                    dst.write(data)
+                    dst.scales = (scale,) * len(band_dates)
+                    dst.offsets = (offset,) * len(band_dates)
+                    for band, date_str in enumerate(band_dates, 1):
+                        dst.set_band_description(band, f'{variable} - {date_str}')
+                        band_catalog.append({
+                            'variable': variable,
+                            'date': date_str,
+                            'geostack_file': geostack_file,
+                            'filename': geostack_name,
+                            'source_band': band
+                        })
                 
-                # Add colorbar
-                plt.colorbar(im, ax=axes[i], shrink=0.8)
-            
-            # Hide unused subplots
-            for i in range(len(sample_files), 6):
-                axes[i].set_visible(False)
-            
-            plt.suptitle(f'Uganda {variable} - Enhanced Spatial Distribution\\nDaily Interpolated Surfaces', 
-                        fontsize=16, fontweight='bold')
-            plt.tight_layout(rect=[0, 0.03, 1, 0.95])
+                interpolation_log['geostack_file'] = geostack_file
+                print(f"  ✅ Created geostack: {len(band_dates)} bands")
             
-            viz_file = os.path.join(output_dir, f'uganda_{variable}_enhanced_spatial_maps.png')
-            plt.savefig(viz_file, dpi=200, bbox_inches='tight')
-            plt.close()
+            # Step 4: Create enhanced visualizations
+            if band_dates:
+                print(f"  📈 Creating visualizations for {variable}...")
+                
+                # Sample the first days straight from the in-memory cube
+                stack = cube[:6]
+                extent = [grid_lon.min(), grid_lon.max(), grid_lat.min(), grid_lat.max()]
+                
+                for cb in colorbars:
+                    cb.remove()
+                colorbars.clear()
+                for ax in axes:
+                    ax.cla()
+                    ax.set_visible(True)
+                
+                # Calculate color scale
+                if np.isfinite(stack).any():
+                    vmin, vmax = np.nanpercentile(stack, [2, 98])
+                else:
+                    vmin, vmax = 0, 1
+                
+                # Plot sample days
+                for i, date_str in enumerate(band_dates[:len(stack)]):
+                    im = axes[i].imshow(stack[i], extent=extent, cmap='viridis', 
+                                      vmin=vmin, vmax=vmax, aspect='auto')
+                    axes[i].set_title(f'{variable}\\n{date_str}', fontsize=11)
+                    axes[i].set_xlabel('Longitude (°E)')
+                    axes[i].set_ylabel('Latitude (°N)')
+                    
+                    # Add colorbar
+                    colorbars.append(fig.colorbar(im, ax=axes[i], shrink=0.8))
+                
+                # Hide unused subplots
+                for i in range(len(stack), 6):
+                    axes[i].set_visible(False)
+                
+                fig.suptitle(f'Uganda {variable} - Enhanced Spatial Distribution\\nDaily Interpolated Surfaces', 
+                            fontsize=16, fontweight='bold')
+                fig.tight_layout(rect=[0, 0.03, 1, 0.95])
+                
+                viz_file = os.path.join(output_dir, f'uganda_{variable}_enhanced_spatial_maps.png')
+                fig.savefig(viz_file, dpi=120)
+                
+                print(f"  ✅ Created visualization: {os.path.basename(viz_file)}")
             
-            print(f"  ✅ Created visualization: {os.path.basename(viz_file)}")
-        
-        # Store results
-        results_summary['variables_processed'].append(variable)
-        results_summary['processing_results'][variable] = interpolation_log
+            # Store results
+            results_summary['variables_processed'].append(variable)
+            results_summary['processing_results'][variable] = interpolation_log
+    
+    plt.close(fig)
     
     # Step 5: Create multi-variable geostack
     print(f"\n🌐 Step 3: Creating Multi-Variable Geostack...")
     
-    all_daily_rasters = sorted(glob(os.path.join(output_dir, 'uganda_*_daily_*.tif')))
+    # Bands are copied straight out of the per-variable geostacks
+    band_catalog.sort(key=lambda entry: (entry['variable'], entry['date']))
     
-    if all_daily_rasters:
-        print(f"📚 Found {len(all_daily_rasters)} daily raster files")
+    if band_catalog:
+        print(f"📚 Found {len(band_catalog)} daily bands")
         
-        # Read first raster for template
-        with rasterio.open(all_daily_rasters[0]) as src:
+        # Read first geostack for template
+        with rasterio.open(band_catalog[0]['geostack_file']) as src:
             profile = src.profile.copy()
-            profile.update({
-                'count': len(all_daily_rasters),
-                'compress': 'lzw'
-            })
+            profile.update(GEOTIFF_OPTIONS, count=len(band_catalog), dtype='float32', nodata=None)
         
         multi_geostack_file = os.path.join(output_dir, 'uganda_all_variables_geostack.tif')
         
         with rasterio.open(multi_geostack_file, 'w', **profile) as dst:
-            for i, raster_file in enumerate(all_daily_rasters, 1):
-                filename = os.path.basename(raster_file)
-                # Extract variable and date: uganda_{variable}_daily_{date}.tif
-                parts = filename.replace('uganda_', '').replace('_daily_', '_').replace('.tif', '').split('_')
-                if len(parts) >= 2:
-                    variable = parts[0]
-                    date = parts[1]
-                    description = f'{variable} - {date}'
-                else:
-                    description = filename
+            sources = {}
+            for i, entry in enumerate(band_catalog, 1):
+                src = sources.get(entry['geostack_file'])
+                if src is None:
+                    src = sources[entry['geostack_file']] = rasterio.open(entry['geostack_file'])
                 
-                with rasterio.open(raster_file) as src:
-                    data = src.read(1)
-                    dst.write(data, i)
-                    dst.set_band_description(i, description)
+                # Tile by tile, decoded to float32; both sides share the same 256x256 block grid
+                for _, window in src.block_windows(entry['source_band']):
+                    dst.write(read_band(src, entry['source_band'], window), i, window=window)
+                dst.set_band_description(i, f"{entry['variable']} - {entry['date']}")
+            
+            for src in sources.values():
+                src.close()
         
-        print(f"✅ Created multi-variable geostack: {len(all_daily_rasters)} bands")
+        print(f"✅ Created multi-variable geostack: {len(band_catalog)} bands")
         
         # Create catalog
         catalog = {
             'multi_geostack_file': multi_geostack_file,
-            'total_bands': len(all_daily_rasters),
-            'variables': list(set([f.split('_')[1] for f in [os.path.basename(f) for f in all_daily_rasters]])),
+            'total_bands': len(band_catalog),
+            'variables': sorted(set(entry['variable'] for entry in band_catalog)),
             'band_catalog': [
                 {
-                    'band_number': i+1,
-                    'filename': os.path.basename(f),
-                    'variable': os.path.basename(f).split('_')[1],
-                    'date': os.path.basename(f).split('_daily_')[1].replace('.tif', '')
+                    'band_number': i,
+                    'filename': entry['filename'],
+                    'source_band': entry['source_band'],
+                    'variable': entry['variable'],
+                    'date': entry['date']
                 }
-                for i, f in enumerate(all_daily_rasters)
+                for i, entry in enumerate(band_catalog, 1)
             ],
             'creation_date': datetime.now().isoformat()
         }
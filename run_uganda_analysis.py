@@ -6,6 +6,8 @@ This script runs the Uganda spatial analysis without Nextflow dependencies
 
 import pandas as pd
 import numpy as np
+import matplotlib
+matplotlib.use('Agg')  # headless: no GUI backend to initialize
 import matplotlib.pyplot as plt
 import json
 import os
@@ -13,6 +15,36 @@ from datetime import datetime
 import warnings
 warnings.filterwarnings('ignore')
 
+try:
+    import datashader as ds
+    HAS_DATASHADER = True
+except ImportError:
+    HAS_DATASHADER = False
+
+def load_uganda_rows(input_csv):
+    """Uganda rows of the daily CSV with parsed dates, cached as Parquet beside the CSV"""
+    cache_file = os.path.splitext(input_csv)[0] + '.uganda.parquet'
+    if os.path.exists(cache_file) and os.path.getmtime(cache_file) >= os.path.getmtime(input_csv):
+        try:
+            return pd.read_parquet(cache_file)
+        except Exception:
+            pass  # unreadable cache, rebuild it from the CSV
+    
+    dtypes = {'country': 'category', 'lat': 'float32', 'lon': 'float32'}
+    try:
+        df = pd.read_csv(input_csv, engine='pyarrow', dtype=dtypes)
+    except (ImportError, ValueError):
+        df = pd.read_csv(input_csv, dtype=dtypes)
+    
+    uganda_df = df[df['country'] == 'Uganda'].copy()
+    uganda_df['date'] = pd.to_datetime(uganda_df['date'], dayfirst=True, errors='coerce')
+    
+    try:
+        uganda_df.to_parquet(cache_file, index=False)
+    except Exception:
+        pass  # read-only data directory or no Parquet engine; the CSV still works
+    return uganda_df
+
 def run_uganda_analysis():
     """Main analysis function for Uganda data"""
     
@@ -30,11 +62,7 @@ def run_uganda_analysis():
     # Step 1: Load and prepare data
     print("📊 Loading Uganda data...")
     try:
-        df = pd.read_csv(input_csv)
-        print(f"Loaded {len(df)} records from Uganda_Daily.csv")
-        
-        # Filter for Uganda
-        uganda_df = df[df['country'] == 'Uganda'].copy()
+        uganda_df = load_uganda_rows(input_csv)
         print(f"Uganda records: {len(uganda_df)}")
         
         # Check available variables
@@ -50,9 +78,6 @@ def run_uganda_analysis():
         uganda_clean = uganda_df[cols_to_keep].copy()
         uganda_clean = uganda_clean.dropna(subset=['lat', 'lon'])
         
-        # Convert date
-        uganda_clean['date'] = pd.to_datetime(uganda_clean['date'], dayfirst=True, errors='coerce')
-        
         print(f"📍 Cleaned dataset: {len(uganda_clean)} records")
         print(f"📅 Date range: {uganda_clean['date'].min()} to {uganda_clean['date'].max()}")
         print(f"🌍 Spatial extent: Lat {uganda_clean['lat'].min():.3f} to {uganda_clean['lat'].max():.3f}, Lon {uganda_clean['lon'].min():.3f} to {uganda_clean['lon'].max():.3f}")
@@ -71,6 +96,14 @@ def run_uganda_analysis():
         'results': {}
     }
     
+    # Daily mean/std/count for every variable in one grouping pass
+    uganda_clean['date_only'] = uganda_clean['date'].dt.normalize()
+    daily_all = uganda_clean.groupby('date_only')[available_vars].agg(['mean', 'std', 'count'])
+    
+    # Two figures reused for every variable, cleared before each plot
+    ts_fig = plt.figure(figsize=(12, 6))
+    spatial_fig = plt.figure(figsize=(10, 8))
+    
     for var in available_vars:
         print(f"\n🔍 Analyzing {var}...")
         
@@ -102,11 +135,12 @@ def run_uganda_analysis():
         }
         
         # Time series analysis
-        daily_stats = valid_data.groupby(valid_data['date'].dt.date)[var].agg(['mean', 'std', 'count']).reset_index()
-        daily_stats['date'] = pd.to_datetime(daily_stats['date'])
+        daily_stats = daily_all[var].rename_axis('date').reset_index()
+        daily_stats = daily_stats[daily_stats['count'] > 0]
         
         # Create time series plot
-        plt.figure(figsize=(12, 6))
+        plt.figure(ts_fig.number)
+        ts_fig.clf()
         plt.plot(daily_stats['date'], daily_stats['mean'], 'b-', linewidth=2, label='Daily Mean')
         plt.fill_between(daily_stats['date'], 
                         daily_stats['mean'] - daily_stats['std'],
@@ -123,24 +157,37 @@ def run_uganda_analysis():
         
         # Save plot
         plot_file = os.path.join(output_dir, f'uganda_{var}_timeseries.png')
-        plt.savefig(plot_file, dpi=150, bbox_inches='tight')
-        plt.close()
+        plt.savefig(plot_file, dpi=120)
         
         # Spatial distribution plot
-        plt.figure(figsize=(10, 8))
-        scatter = plt.scatter(valid_data['lon'], valid_data['lat'], 
-                            c=valid_data[var], cmap='viridis', 
-                            s=20, alpha=0.6)
+        plt.figure(spatial_fig.number)
+        spatial_fig.clf()
+        if len(valid_data) > 5000 and HAS_DATASHADER:
+            # Rasterize per-pixel means in compiled code, then draw one image
+            lon_range = (float(valid_data['lon'].min()), float(valid_data['lon'].max()))
+            lat_range = (float(valid_data['lat'].min()), float(valid_data['lat'].max()))
+            cvs = ds.Canvas(plot_width=400, plot_height=400, x_range=lon_range, y_range=lat_range)
+            agg = cvs.points(valid_data, 'lon', 'lat', ds.mean(var))
+            scatter = plt.imshow(agg.values, origin='lower', cmap='viridis', aspect='auto',
+                                 extent=[*lon_range, *lat_range], interpolation='nearest')
+        elif len(valid_data) > 5000:
+            # Binned means: cost scales with bins, not points
+            scatter = plt.hexbin(valid_data['lon'], valid_data['lat'], C=valid_data[var],
+                                 reduce_C_function=np.mean, gridsize=80, cmap='viridis')
+        else:
+            scatter = plt.scatter(valid_data['lon'], valid_data['lat'], 
+                                c=valid_data[var], cmap='viridis', 
+                                s=20, alpha=0.6)
         plt.colorbar(scatter, label=f'{var} Value')
         plt.title(f'Uganda {var} - Spatial Distribution', fontsize=14)
         plt.xlabel('Longitude', fontsize=12)
         plt.ylabel('Latitude', fontsize=12)
         plt.grid(True, alpha=0.3)
+        plt.tight_layout()
         
         # Save spatial plot
         spatial_file = os.path.join(output_dir, f'uganda_{var}_spatial.png')
-        plt.savefig(spatial_file, dpi=150, bbox_inches='tight')
-        plt.close()
+        plt.savefig(spatial_file, dpi=120)
         
         stats['plots_created'] = [
             f'uganda_{var}_timeseries.png',
@@ -150,6 +197,8 @@ def run_uganda_analysis():
         results['results'][var] = stats
         print(f"  ✅ {var}: {len(valid_data)} points, Range: {stats['value_stats']['min']:.3f} - {stats['value_stats']['max']:.3f}")
     
+    plt.close('all')
+    
     # Step 3: Summary Report
     print(f"\n📋 Generating summary report...")
     
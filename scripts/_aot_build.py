@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+"""
+Ahead-of-time build of the CHEAQI IDW kernels
+
+Compiles the Numba kernels from cheaqi_core into a cheaqi_kernels extension
+module next to this script. The compiled kernels run serially, so cheaqi_core
+only uses them when NUMBA_NUM_THREADS=1, where they skip JIT warm-up.
+Run once per environment: python scripts/_aot_build.py
+"""
+
+from pathlib import Path
+
+from numba.pycc import CC
+
+from cheaqi_core import idw_kernel_many_source, idw_kernel_source
+
+cc = CC("cheaqi_kernels")
+cc.output_dir = str(Path(__file__).resolve().parent)
+
+# Signatures match the float32 values/distances and intp indices idw_weighted passes in
+cc.export("idw_kernel", "void(f4[::1], i8[:, ::1], f4[:, ::1], f4, f4[::1])")(idw_kernel_source)
+cc.export("idw_kernel_many", "void(f4[:, ::1], i8[:, ::1], f4[:, ::1], f4, f4[:, ::1])")(idw_kernel_many_source)
+
+if __name__ == "__main__":
+    cc.compile()
+    print(f"Built cheaqi_kernels in {cc.output_dir}")
@@ -19,6 +19,44 @@ import pandas as pd
 # Note: This requires the notebook functions to be extracted into a separate module
 
 
+def parquet_cache(input_path: Path) -> Optional[Path]:
+    """Columnar copy of the CSV beside it, converted once in streamed batches; None if unavailable."""
+    cache_path = input_path.with_suffix(".batch.parquet")
+    if cache_path.exists() and cache_path.stat().st_mtime >= input_path.stat().st_mtime:
+        return cache_path
+    try:
+        import pyarrow.csv as pv
+        import pyarrow.parquet as pq
+        
+        reader = pv.open_csv(input_path)
+        with pq.ParquetWriter(cache_path, reader.schema) as writer:
+            for batch in reader:
+                writer.write_batch(batch)
+        print(f"INFO: Cached {input_path.name} as {cache_path.name}")
+        return cache_path
+    except Exception as e:
+        # Read-only directory, missing pyarrow or types that drift between blocks; the CSV still works
+        print(f"WARNING: Parquet cache unavailable ({e}); reading the CSV")
+        cache_path.unlink(missing_ok=True)
+        return None
+
+
+def load_observations(input_path: Path, key_cols: Sequence[str], variables: Sequence[str]) -> pd.DataFrame:
+    """Read only the coordinate, date and variable columns, with float32 variables."""
+    usecols = list(dict.fromkeys([*key_cols, *variables]))
+    dtype = {col: "float32" for col in variables}
+    cache_path = parquet_cache(input_path)
+    if cache_path is not None:
+        import pyarrow.parquet as pq
+        
+        table = pq.read_table(cache_path, columns=usecols, memory_map=True)
+        return table.to_pandas().astype(dtype)
+    try:
+        return pd.read_csv(input_path, usecols=usecols, dtype=dtype, engine="pyarrow")
+    except (ImportError, ValueError):
+        return pd.read_csv(input_path, usecols=usecols, dtype=dtype)
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="CHEAQI Spatial Interpolation Batch Processor"
@@ -72,7 +110,7 @@ def main():
     
     parser.add_argument(
         "--method",
-        choices=["gdal_grid", "python_idw_kdtree", "pykrige_ok"],
+        choices=["gdal_grid", "python_idw_kdtree", "cuda_idw", "pykrige_ok"],
         default="gdal_grid",
         help="Interpolation method (default: gdal_grid)"
     )
@@ -156,8 +194,15 @@ def main():
         # Note: This would import from the extracted notebook functions
         from cheaqi_core import process_workflow
         
+        observations = load_observations(
+            input_path,
+            [args.lon_col, args.lat_col, args.date_col],
+            variables,
+        )
+        print(f"Loaded {len(observations)} rows")
+        
         process_workflow(
-            csv_path=str(input_path),
+            csv_path=observations,
             aoi_path=args.aoi,
             lon_col=args.lon_col,
             lat_col=args.lat_col,
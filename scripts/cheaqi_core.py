@@ -5,40 +5,1074 @@ This module contains the core spatial interpolation functions extracted
 from the CHEAQI notebook for use in batch processing and containerized workflows.
 """
 
-# This would contain all the core functions from the notebook
-# For now, we'll create a placeholder that imports from the notebook
-
-import sys
+import json
+import math
+import multiprocessing
+import os
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
 from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from pyproj import CRS, Transformer
+from pyproj.exceptions import ProjError
+from tqdm.auto import tqdm
+
+try:
+    from osgeo import gdal, osr
+    HAS_GDAL_PY = True
+except Exception:
+    gdal = None
+    osr = None
+    HAS_GDAL_PY = False
+
+try:
+    import numba
+    from numba import njit, prange
+    HAS_NUMBA = True
+except Exception:
+    HAS_NUMBA = False
+
+try:
+    from numba import cuda
+    HAS_CUDA = cuda.is_available()
+except Exception:
+    cuda = None
+    HAS_CUDA = False
+
+try:
+    from scipy.spatial import cKDTree
+    HAS_SCIPY = True
+except Exception:
+    cKDTree = None
+    HAS_SCIPY = False
+
+try:
+    from pykrige.ok import OrdinaryKriging
+    HAS_PYKRIGE = True
+except Exception:
+    OrdinaryKriging = None
+    HAS_PYKRIGE = False
+
+try:
+    import pyogrio
+    HAS_PYOGRIO = True
+except Exception:
+    pyogrio = None
+    HAS_PYOGRIO = False
+
+try:
+    import fiona
+    HAS_FIONA = True
+except Exception:
+    fiona = None
+    HAS_FIONA = False
+
+try:
+    import rasterio
+    from rasterio.transform import Affine
+    HAS_RASTERIO = True
+except Exception:
+    rasterio = None
+    Affine = None
+    HAS_RASTERIO = False
+
+try:
+    import xarray as xr
+    HAS_XARRAY = True
+except Exception:
+    xr = None
+    HAS_XARRAY = False
+
+GDAL_CMDS: Dict[str, Optional[str]] = {
+    "gdal_grid": shutil.which("gdal_grid"),
+    "gdalbuildvrt": shutil.which("gdalbuildvrt"),
+    "gdal_translate": shutil.which("gdal_translate"),
+}
+GDAL_AVAILABLE = all(GDAL_CMDS.values())
+
+NODATA_VALUE = -9999.0
+MASTER_STACK_NAME = "CHEAQI_master_stack.tif"
+NETCDF_TIMESERIES_NAME = "CHEAQI_timeseries.nc"
+PROJ_PIPELINE_CACHE = Path(os.environ.get("CHEAQI_CACHE_DIR", Path.home() / ".cache" / "cheaqi")) / "proj_pipelines.json"
+IDW_NEIGHBORS = 12
+IDW_TILE_BYTES = 16 * 1024 * 1024
+
+pd.options.mode.chained_assignment = None
+
+
+def determine_utm_epsg(lon: float, lat: float) -> int:
+    zone = int((lon + 180.0) / 6.0) + 1
+    return 32600 + zone if lat >= 0 else 32700 + zone
+
+
+def prepare_dataframe(
+    df: pd.DataFrame,
+    lon_col: str,
+    lat_col: str,
+    date_col: str,
+    variable_cols: Sequence[str],
+) -> pd.DataFrame:
+    columns = list(dict.fromkeys([lon_col, lat_col, date_col, *variable_cols]))
+    working = df[columns].copy()
+    working[lon_col] = pd.to_numeric(working[lon_col], errors="coerce")
+    working[lat_col] = pd.to_numeric(working[lat_col], errors="coerce")
+    working["__cheaqi_date"] = pd.to_datetime(working[date_col], errors="coerce", utc=False, cache=True)
+    working["__cheaqi_date"] = working["__cheaqi_date"].dt.tz_localize(None)
+    for column in variable_cols:
+        working[column] = pd.to_numeric(working[column], errors="coerce").astype(np.float32)
+    # One vectorized mask instead of successive dropna/copy passes; NaNs fail the range checks
+    valid = (
+        working[lon_col].between(-180.0, 180.0)
+        & working[lat_col].between(-90.0, 90.0)
+        & working["__cheaqi_date"].notna()
+    )
+    if not valid.any():
+        raise ValueError("No valid rows remain after cleaning coordinates and dates.")
+    valid &= working[list(variable_cols)].notna().any(axis=1)
+    if not valid.any():
+        raise ValueError("Selected variables contain no numeric samples.")
+    return working.loc[valid]
+
+
+def load_pipeline_cache() -> Dict[str, str]:
+    try:
+        with open(PROJ_PIPELINE_CACHE) as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return {}
+
+
+@lru_cache(maxsize=64)
+def cached_transformer(source, target, always_xy: bool = True) -> Transformer:
+    # Building a PROJ pipeline costs far more than running it; reuse one per CRS pair,
+    # and keep resolved pipeline strings on disk so later runs skip the PROJ database search
+    key = f"{source}|{target}|{int(always_xy)}"
+    pipelines = load_pipeline_cache()
+    stale = pipelines.pop(key, None)
+    if stale is not None:
+        try:
+            return Transformer.from_pipeline(stale)
+        except ProjError:
+            pass
+    transformer = Transformer.from_crs(source, target, always_xy=always_xy)
+    # Ambiguous CRS pairs report a placeholder definition; only keep pipelines PROJ can rebuild
+    try:
+        Transformer.from_pipeline(transformer.definition)
+        pipelines[key] = transformer.definition
+    except ProjError:
+        if stale is None:
+            return transformer
+    try:
+        PROJ_PIPELINE_CACHE.parent.mkdir(parents=True, exist_ok=True)
+        with open(PROJ_PIPELINE_CACHE, "w") as handle:
+            json.dump(pipelines, handle, indent=2)
+    except OSError:
+        pass
+    return transformer
+
+
+def reproject_dataframe(df: pd.DataFrame, lon_col: str, lat_col: str, target_epsg: int) -> pd.DataFrame:
+    transformer = cached_transformer("EPSG:4326", f"EPSG:{int(target_epsg)}")
+    xs, ys = transformer.transform(df[lon_col].to_numpy(), df[lat_col].to_numpy())
+    result = df.copy()
+    result["x"] = xs
+    result["y"] = ys
+    return result
+
+
+def read_aoi_bounds(aoi_path: Optional[str], target_epsg: int) -> Optional[Tuple[float, float, float, float]]:
+    if not aoi_path:
+        return None
+    path = Path(aoi_path).expanduser()
+    if not path.exists():
+        raise FileNotFoundError(f"AOI file not found: {path}")
+    target = CRS.from_epsg(int(target_epsg))
+    if HAS_PYOGRIO:
+        # Layer metadata only: total bounds and CRS without decoding any features
+        info = pyogrio.read_info(path, force_total_bounds=True)
+        bounds = tuple(float(value) for value in info["total_bounds"])
+        if not info.get("crs"):
+            raise ValueError("AOI CRS is undefined.")
+        source = CRS.from_user_input(info["crs"])
+        if source == target:
+            return bounds
+        transformer = cached_transformer(source, target)
+        minx, miny = transformer.transform(bounds[0], bounds[1])
+        maxx, maxy = transformer.transform(bounds[2], bounds[3])
+        return (min(minx, maxx), min(miny, maxy), max(minx, maxx), max(miny, maxy))
+    if HAS_FIONA:
+        with fiona.open(path) as src:
+            bounds = src.bounds  # minx, miny, maxx, maxy
+            if not src.crs:
+                raise ValueError("AOI CRS is undefined.")
+            source = CRS(src.crs)
+            if source == target:
+                return bounds
+            transformer = cached_transformer(source, target)
+            minx, miny = transformer.transform(bounds[0], bounds[1])
+            maxx, maxy = transformer.transform(bounds[2], bounds[3])
+            return (min(minx, maxx), min(miny, maxy), max(minx, maxx), max(miny, maxy))
+    if HAS_GDAL_PY:
+        datasource = gdal.OpenEx(str(path), gdal.OF_VECTOR)
+        if datasource is None:
+            raise RuntimeError("Unable to read AOI with GDAL.")
+        layer = datasource.GetLayer(0)
+        extent = layer.GetExtent()  # minx, maxx, miny, maxy
+        spatial_ref = layer.GetSpatialRef()
+        datasource = None
+        if spatial_ref is None:
+            raise ValueError("AOI CRS is undefined.")
+        source = CRS.from_wkt(spatial_ref.ExportToWkt())
+        if source == target:
+            return (extent[0], extent[2], extent[1], extent[3])
+        transformer = cached_transformer(source, target)
+        minx, miny = transformer.transform(extent[0], extent[2])
+        maxx, maxy = transformer.transform(extent[1], extent[3])
+        return (min(minx, maxx), min(miny, maxy), max(minx, maxx), max(miny, maxy))
+    raise RuntimeError("Reading an AOI requires pyogrio, Fiona or GDAL Python bindings.")
+
+
+def derive_extent(
+    df: pd.DataFrame,
+    cell_size: float,
+    aoi_path: Optional[str],
+    target_epsg: int,
+) -> Tuple[float, float, float, float]:
+    extent = None
+    if aoi_path:
+        try:
+            extent = read_aoi_bounds(aoi_path, target_epsg)
+            if extent:
+                rounded = [round(val, 2) for val in extent]
+                print(f"Using AOI-derived extent: {rounded}")
+        except Exception as exc:
+            print(f"AOI extent unavailable ({exc}); falling back to point coverage.")
+    if extent is None:
+        xmin = float(df["x"].min())
+        xmax = float(df["x"].max())
+        ymin = float(df["y"].min())
+        ymax = float(df["y"].max())
+        buffer_size = max(cell_size, cell_size * 0.5)
+        extent = (xmin - buffer_size, ymin - buffer_size, xmax + buffer_size, ymax + buffer_size)
+        print("Point-derived extent (with buffer) will be used.")
+    if extent[0] >= extent[2] or extent[1] >= extent[3]:
+        raise ValueError("Extent is invalid; please verify inputs.")
+    return extent
+
+
+def build_grid(extent: Tuple[float, float, float, float], cell_size: float) -> Dict[str, np.ndarray]:
+    xmin, ymin, xmax, ymax = extent
+    width = max(1, int(math.ceil((xmax - xmin) / cell_size)))
+    height = max(1, int(math.ceil((ymax - ymin) / cell_size)))
+    xmax_adjusted = xmin + width * cell_size
+    ymax_adjusted = ymin + height * cell_size
+    transform = (xmin, cell_size, 0.0, ymax_adjusted, 0.0, -cell_size)
+    x_centers = xmin + cell_size * (np.arange(width) + 0.5)
+    y_centers = ymax_adjusted - cell_size * (np.arange(height) + 0.5)
+    # (1, W) and (H, 1) views; callers broadcast them one tile at a time
+    grid_x, grid_y = np.meshgrid(x_centers, y_centers, sparse=True)
+    return {
+        "width": width,
+        "height": height,
+        "transform": transform,
+        "grid_x": grid_x,
+        "grid_y": grid_y,
+        "x_coords": x_centers,
+        "y_coords": y_centers,
+    }
+
+
+def create_vrt(csv_path: Path, layer_name: str, epsg: int, x_field: str = "x", y_field: str = "y") -> str:
+    sanitized = Path(csv_path).as_posix()
+    return f'''<OGRVRTDataSource>
+  <OGRVRTLayer name="{layer_name}">
+    <SrcDataSource>{sanitized}</SrcDataSource>
+    <GeometryType>wkbPoint</GeometryType>
+    <LayerSRS>EPSG:{epsg}</LayerSRS>
+    <GeometryField encoding="PointFromColumns" x="{x_field}" y="{y_field}"/>
+  </OGRVRTLayer>
+</OGRVRTDataSource>
+'''
+
 
-# Add the notebook directory to the path
-sys.path.append('/app/notebooks')
-
-try:
-    # Import all the functions from the original notebook
-    # Note: The notebook would need to be converted to a .py module
-    # or the functions would need to be copied here
-    
-    from cheaqi_interactive_containerization import (
-        determine_utm_epsg,
-        prepare_dataframe,
-        reproject_dataframe,
-        read_aoi_bounds,
-        derive_extent,
-        build_grid,
-        process_workflow,
-        # ... other functions
+def run_command(command: Sequence[str], env: Optional[Dict[str, str]] = None) -> None:
+    process = subprocess.run(command, capture_output=True, text=True, env=env)
+    if process.stdout:
+        print(process.stdout.strip())
+    if process.returncode != 0:
+        stderr = process.stderr.strip()
+        raise RuntimeError(f"Command failed ({command[0]}): {stderr or process.stdout}")
+
+
+def set_band_descriptions(raster_path: Path, band_names: Sequence[str]) -> None:
+    if not band_names:
+        return
+    raster_path = Path(raster_path)
+    applied = False
+    if HAS_GDAL_PY:
+        dataset = gdal.Open(str(raster_path), gdal.GA_Update)
+        if dataset is not None:
+            for index, name in enumerate(band_names, start=1):
+                band = dataset.GetRasterBand(index)
+                if band is not None:
+                    band.SetDescription(str(name))
+            dataset.FlushCache()
+            dataset = None
+            applied = True
+    if not applied and HAS_RASTERIO:
+        try:
+            with rasterio.open(raster_path, "r+") as dst:
+                for index, name in enumerate(band_names, start=1):
+                    dst.set_band_description(index, str(name))
+            applied = True
+        except Exception:
+            pass
+    if not applied:
+        print(f"Warning: unable to set band names for {raster_path}")
+
+
+def write_geotiff_stack(
+    stack: np.ndarray,
+    transform: Tuple[float, float, float, float, float, float],
+    epsg: int,
+    output_path: Path,
+    band_names: Optional[Sequence[str]] = None,
+    nodata: float = NODATA_VALUE,
+) -> None:
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    bands, height, width = stack.shape
+    band_names = list(band_names or [])
+    if HAS_GDAL_PY:
+        driver = gdal.GetDriverByName("GTiff")
+        dataset = driver.Create(
+            str(output_path),
+            width,
+            height,
+            bands,
+            gdal.GDT_Float32,
+            options=["COMPRESS=DEFLATE", "TILED=YES", "BIGTIFF=IF_SAFER"],
+        )
+        dataset.SetGeoTransform(transform)
+        srs = osr.SpatialReference()
+        srs.ImportFromEPSG(int(epsg))
+        dataset.SetProjection(srs.ExportToWkt())
+        for index in range(bands):
+            band = dataset.GetRasterBand(index + 1)
+            data = stack[index].astype(np.float32)
+            mask = ~np.isfinite(data)
+            if mask.any():
+                data = data.copy()
+                data[mask] = nodata
+            band.WriteArray(data)
+            band.SetNoDataValue(nodata)
+            if index < len(band_names):
+                band.SetDescription(str(band_names[index]))
+        dataset.FlushCache()
+        dataset = None
+        return
+    if HAS_RASTERIO and Affine is not None:
+        affine = Affine(transform[1], transform[2], transform[0], transform[4], transform[5], transform[3])
+        with rasterio.open(
+            output_path,
+            "w",
+            driver="GTiff",
+            height=height,
+            width=width,
+            count=bands,
+            dtype="float32",
+            crs=f"EPSG:{epsg}",
+            transform=affine,
+            nodata=nodata,
+            compress="DEFLATE",
+            tiled=True,
+            BIGTIFF="IF_SAFER",
+        ) as dst:
+            for index in range(bands):
+                data = stack[index].astype(np.float32)
+                mask = ~np.isfinite(data)
+                if mask.any():
+                    data = data.copy()
+                    data[mask] = nodata
+                dst.write(data, index + 1)
+                if index < len(band_names):
+                    dst.set_band_description(index + 1, str(band_names[index]))
+        return
+    raise RuntimeError("Writing GeoTIFF rasters requires GDAL or rasterio.")
+
+
+# Added to d**power so an exact hit gets a dominant but finite weight instead of a branch
+IDW_EPSILON = 1e-30
+
+if HAS_NUMBA:
+    def idw_kernel_source(values, indices, distances, power, out):
+        """Branchless weighted sums over precomputed KD-tree neighbours"""
+        for i in prange(indices.shape[0]):
+            num = np.float32(0.0)
+            den = np.float32(0.0)
+            for j in range(indices.shape[1]):
+                w = np.float32(1.0) / (distances[i, j] ** power + np.float32(IDW_EPSILON))
+                num += w * values[indices[i, j]]
+                den += w
+            out[i] = num / den if den > 0.0 else np.nan
+
+    def idw_kernel_many_source(values, indices, distances, power, out):
+        """idw_kernel over a (variables, samples) block, reading each neighbour list once for every variable"""
+        for i in prange(indices.shape[0]):
+            for v in range(values.shape[0]):
+                out[v, i] = 0.0
+            den = np.float32(0.0)
+            for j in range(indices.shape[1]):
+                w = np.float32(1.0) / (distances[i, j] ** power + np.float32(IDW_EPSILON))
+                den += w
+                for v in range(values.shape[0]):
+                    out[v, i] += w * values[v, indices[i, j]]
+            for v in range(values.shape[0]):
+                out[v, i] = out[v, i] / den if den > 0.0 else np.nan
+
+    idw_kernel = idw_kernel_many = None
+    # The _aot_build.py module skips JIT warm-up but runs prange serially, so it only
+    # stands in for the parallel kernels when Numba is limited to one thread anyway
+    if numba.config.NUMBA_NUM_THREADS == 1:
+        try:
+            from cheaqi_kernels import idw_kernel, idw_kernel_many
+        except ImportError:
+            pass
+    if idw_kernel is None:
+        idw_kernel = njit(parallel=True, fastmath=True, cache=True, error_model="numpy")(idw_kernel_source)
+        idw_kernel_many = njit(parallel=True, fastmath=True, cache=True, error_model="numpy")(idw_kernel_many_source)
+
+
+if HAS_CUDA:
+    @cuda.jit
+    def idw_cuda_kernel(values, indices, distances, power, out):
+        """One thread per grid cell: idw_kernel_many on the GPU"""
+        i = cuda.grid(1)
+        if i >= indices.shape[0]:
+            return
+        for v in range(values.shape[0]):
+            num = np.float32(0.0)
+            den = np.float32(0.0)
+            for j in range(indices.shape[1]):
+                w = np.float32(1.0) / (distances[i, j] ** power + np.float32(IDW_EPSILON))
+                num += w * values[v, indices[i, j]]
+                den += w
+            out[v, i] = num / den if den > 0.0 else math.nan
+
+
+def idw_neighbors(
+    tree,
+    grid_x: np.ndarray,
+    grid_y: np.ndarray,
+    workers: int,
+) -> Tuple[np.ndarray, np.ndarray]:
+    grid_x, grid_y = np.broadcast_arrays(grid_x, grid_y)
+    samples = np.column_stack([grid_x.ravel(), grid_y.ravel()])
+    neighbors = min(tree.n, IDW_NEIGHBORS)
+    distances, indices = tree.query(samples, k=neighbors, workers=workers)
+    if neighbors == 1:
+        distances = distances[:, np.newaxis]
+        indices = indices[:, np.newaxis]
+    return distances.astype(np.float32), indices
+
+
+def idw_weighted(
+    values: np.ndarray,
+    distances: np.ndarray,
+    indices: np.ndarray,
+    power: float,
+    shape: Tuple[int, int],
+) -> np.ndarray:
+    if HAS_NUMBA:
+        results = np.empty(distances.shape[0], dtype=np.float32)
+        idw_kernel(np.ascontiguousarray(values, dtype=np.float32), indices, distances, np.float32(power), results)
+        return results.reshape(shape)
+    # Zero or underflowing distances give infinite weights instead of a RuntimeWarning per call;
+    # those cells take that sample's value
+    with np.errstate(divide="ignore", over="ignore", invalid="ignore"):
+        weights = 1.0 / np.power(distances, power)
+    hits = ~np.isfinite(weights)
+    hit_rows = hits.any(axis=1)
+    weights[hits] = 0.0
+    weight_sum = weights.sum(axis=1)
+    results = np.full(distances.shape[0], np.nan, dtype=np.float32)
+    valid = ~hit_rows & (weight_sum > 0)
+    results[valid] = (weights[valid] * values[indices[valid]]).sum(axis=1) / weight_sum[valid]
+    if hit_rows.any():
+        results[hit_rows] = values[indices[hit_rows, hits[hit_rows].argmax(axis=1)]]
+    return results.reshape(shape)
+
+
+def idw_weighted_many(
+    values: np.ndarray,
+    distances: np.ndarray,
+    indices: np.ndarray,
+    power: float,
+    shape: Tuple[int, int],
+) -> np.ndarray:
+    if HAS_NUMBA:
+        results = np.empty((values.shape[0], distances.shape[0]), dtype=np.float32)
+        idw_kernel_many(np.ascontiguousarray(values, dtype=np.float32), indices, distances, np.float32(power), results)
+        return results.reshape((values.shape[0],) + tuple(shape))
+    return np.stack([idw_weighted(row, distances, indices, power, shape) for row in values])
+
+
+def idw_weighted_cuda(
+    values: np.ndarray,
+    distances: np.ndarray,
+    indices: np.ndarray,
+    power: float,
+    shape: Tuple[int, int],
+) -> np.ndarray:
+    threads = 256
+    blocks = (distances.shape[0] + threads - 1) // threads
+    out = cuda.device_array((values.shape[0], distances.shape[0]), dtype=np.float32)
+    idw_cuda_kernel[blocks, threads](
+        cuda.to_device(np.ascontiguousarray(values, dtype=np.float32)),
+        cuda.to_device(indices),
+        cuda.to_device(distances),
+        np.float32(power),
+        out,
     )
-    
-    print("Successfully imported CHEAQI core functions")
-    
-except ImportError as e:
-    print(f"Warning: Could not import notebook functions: {e}")
-    print("Please convert the notebook to a Python module or copy the functions here")
-    
-    # Provide stub implementations for development
-    def process_workflow(*args, **kwargs):
-        raise NotImplementedError(
-            "Core processing functions not available. "
-            "Please extract functions from the notebook."
-        )
\ No newline at end of file
+    return out.copy_to_host().reshape((values.shape[0],) + tuple(shape))
+
+
+def idw_interpolate(
+    coords: np.ndarray,
+    values: np.ndarray,
+    grid_x: np.ndarray,
+    grid_y: np.ndarray,
+    power: float,
+    workers: int,
+) -> np.ndarray:
+    shape = np.broadcast_shapes(grid_x.shape, grid_y.shape)
+    if coords.size == 0:
+        return np.full(shape, np.nan, dtype=np.float32)
+    distances, indices = idw_neighbors(cKDTree(coords), grid_x, grid_y, max(1, workers))
+    return idw_weighted(values, distances, indices, power, shape)
+
+
+def create_master_stack(band_plan: Sequence[Dict[str, str]], output_path: Path) -> Optional[Path]:
+    band_plan = list(band_plan)
+    if not band_plan:
+        return None
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    template_path = Path(band_plan[0]["path"])
+    if HAS_GDAL_PY:
+        template = gdal.Open(str(template_path))
+        if template is None:
+            raise RuntimeError(f"Unable to open template raster: {template_path}")
+        width = template.RasterXSize
+        height = template.RasterYSize
+        transform = template.GetGeoTransform()
+        projection = template.GetProjection()
+        driver = gdal.GetDriverByName("GTiff")
+        dataset = driver.Create(
+            str(output_path),
+            width,
+            height,
+            len(band_plan),
+            gdal.GDT_Float32,
+            options=["COMPRESS=DEFLATE", "TILED=YES", "BIGTIFF=IF_SAFER"],
+        )
+        dataset.SetGeoTransform(transform)
+        if projection:
+            dataset.SetProjection(projection)
+        for index, plan in enumerate(band_plan, start=1):
+            source = gdal.Open(str(plan["path"]))
+            if source is None:
+                raise RuntimeError(f"Unable to open {plan['path']} for master stack.")
+            src_band = source.GetRasterBand(int(plan["band"]))
+            data = src_band.ReadAsArray().astype(np.float32)
+            mask = ~np.isfinite(data)
+            if mask.any():
+                data = data.copy()
+                data[mask] = NODATA_VALUE
+            dst_band = dataset.GetRasterBand(index)
+            dst_band.WriteArray(data)
+            dst_band.SetNoDataValue(NODATA_VALUE)
+            dst_band.SetDescription(plan.get("label", ""))
+            source = None
+        dataset.FlushCache()
+        dataset = None
+        template = None
+        return output_path
+    if HAS_RASTERIO:
+        with rasterio.open(template_path) as template:
+            profile = template.profile
+        profile.update(
+            count=len(band_plan),
+            dtype="float32",
+            compress="DEFLATE",
+            tiled=True,
+            BIGTIFF="IF_SAFER",
+            nodata=NODATA_VALUE,
+        )
+        with rasterio.open(output_path, "w", **profile) as dst:
+            for index, plan in enumerate(band_plan, start=1):
+                with rasterio.open(plan["path"]) as src:
+                    data = src.read(int(plan["band"])).astype(np.float32)
+                mask = ~np.isfinite(data)
+                if mask.any():
+                    data = data.copy()
+                    data[mask] = NODATA_VALUE
+                dst.write(data, index)
+                dst.set_band_description(index, plan.get("label", ""))
+        return output_path
+    if GDAL_AVAILABLE:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmpdir = Path(tmpdir)
+            vrt_path = tmpdir / "master_stack.vrt"
+            ordered_files: List[str] = []
+            for entry in band_plan:
+                path = entry["path"]
+                if not ordered_files or ordered_files[-1] != path:
+                    ordered_files.append(path)
+            command = [GDAL_CMDS["gdalbuildvrt"], "-separate", str(vrt_path), *ordered_files]
+            run_command(command)
+            translate_command = [
+                GDAL_CMDS["gdal_translate"],
+                str(vrt_path),
+                str(output_path),
+                "-co",
+                "COMPRESS=DEFLATE",
+                "-co",
+                "TILED=YES",
+                "-co",
+                "BIGTIFF=IF_SAFER",
+                "-a_nodata",
+                str(NODATA_VALUE),
+            ]
+            run_command(translate_command)
+        return output_path
+    raise RuntimeError("Unable to create master GeoTIFF; install GDAL (CLI/Python) or rasterio.")
+
+
+def read_raster_stack(raster_path: Path) -> Tuple[np.ndarray, Tuple[float, float, float, float, float, float], int, int]:
+    raster_path = Path(raster_path)
+    if HAS_GDAL_PY:
+        dataset = gdal.Open(str(raster_path))
+        if dataset is None:
+            raise RuntimeError(f"Unable to open raster: {raster_path}")
+        width = dataset.RasterXSize
+        height = dataset.RasterYSize
+        transform = dataset.GetGeoTransform()
+        data = []
+        for band_index in range(dataset.RasterCount):
+            band = dataset.GetRasterBand(band_index + 1)
+            data.append(band.ReadAsArray().astype(np.float32))
+        dataset = None
+        return np.stack(data), transform, width, height
+    if HAS_RASTERIO:
+        with rasterio.open(raster_path) as src:
+            data = src.read().astype(np.float32)
+            transform = src.transform.to_gdal()
+            width = src.width
+            height = src.height
+        return data, transform, width, height
+    raise RuntimeError("Reading rasters requires GDAL or rasterio.")
+
+
+def build_timeseries_netcdf(
+    time_plan: Sequence[Dict[str, object]],
+    variables: Sequence[str],
+    epsg: int,
+    output_path: Path,
+) -> None:
+    if not time_plan:
+        return
+    if not HAS_XARRAY:
+        print("Skipping NetCDF export because xarray is unavailable.")
+        return
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    _, transform, width, height = read_raster_stack(time_plan[0]["path"])
+    x_coords = transform[0] + transform[1] * (np.arange(width) + 0.5)
+    y_coords = transform[3] + transform[5] * (np.arange(height) + 0.5)
+    data_store: Dict[str, List[np.ndarray]] = {var: [] for var in variables}
+    times: List[pd.Timestamp] = []
+    for entry in time_plan:
+        stack, _, _, _ = read_raster_stack(entry["path"])
+        if stack.shape[0] < len(variables):
+            raise ValueError(f"Raster {entry['path']} has fewer bands than expected.")
+        for idx, variable in enumerate(variables):
+            data_store[variable].append(stack[idx])
+        times.append(pd.to_datetime(entry["date"]))
+    coords = {
+        "time": pd.to_datetime(times),
+        "y": y_coords,
+        "x": x_coords,
+    }
+    data_vars = {
+        variable: (("time", "y", "x"), np.stack(arrays, axis=0))
+        for variable, arrays in data_store.items()
+    }
+    dataset = xr.Dataset(data_vars=data_vars, coords=coords, attrs={"crs": f"EPSG:{epsg}", "nodata": NODATA_VALUE})
+    dataset.to_netcdf(output_path)
+    dataset.close()
+    print(f"NetCDF time series created: {output_path}")
+
+
+def interpolate_with_gdal_bindings(
+    group_df: pd.DataFrame,
+    variables: Sequence[str],
+    epsg: int,
+    extent: Tuple[float, float, float, float],
+    cell_size: float,
+    power: float,
+    jobs: int,
+    output_path: Path,
+) -> None:
+    # gdal.Grid in-process over a /vsimem/ copy of the points: no subprocesses, temp files or CSV re-parse per band
+    grid = build_grid(extent, cell_size)
+    xmin, top = grid["transform"][0], grid["transform"][3]
+    bounds = [xmin, top, xmin + grid["width"] * cell_size, top - grid["height"] * cell_size]
+    prefix = f"/vsimem/cheaqi_{os.getpid()}_{Path(output_path).stem}"
+    csv_path = f"{prefix}.csv"
+    vrt_path = f"{prefix}.vrt"
+    gdal.FileFromMemBuffer(csv_path, group_df[["x", "y", *variables]].to_csv(index=False).encode("utf-8"))
+    gdal.FileFromMemBuffer(vrt_path, create_vrt(Path(csv_path), "points", epsg, "x", "y").encode("utf-8"))
+    stack = []
+    try:
+        with gdal.config_options({"GDAL_NUM_THREADS": str(max(1, int(jobs))), "CPL_DEBUG": "OFF"}):
+            for variable in tqdm(variables, desc="Variables (GDAL)", leave=False):
+                options = gdal.GridOptions(
+                    format="MEM",
+                    zfield=variable,
+                    algorithm=f"invdist:power={power}:nodata={NODATA_VALUE}",
+                    outputBounds=bounds,
+                    width=grid["width"],
+                    height=grid["height"],
+                    outputType=gdal.GDT_Float32,
+                    layers=["points"],
+                )
+                dataset = gdal.Grid("", vrt_path, options=options)
+                data = dataset.GetRasterBand(1).ReadAsArray().astype(np.float32)
+                dataset = None
+                data[data == NODATA_VALUE] = np.nan
+                stack.append(data)
+    finally:
+        gdal.Unlink(csv_path)
+        gdal.Unlink(vrt_path)
+    write_geotiff_stack(np.stack(stack), grid["transform"], epsg, output_path, band_names=list(variables))
+
+
+def interpolate_with_gdal(
+    group_df: pd.DataFrame,
+    variables: Sequence[str],
+    epsg: int,
+    extent: Tuple[float, float, float, float],
+    cell_size: float,
+    power: float,
+    jobs: int,
+    output_path: Path,
+) -> None:
+    if HAS_GDAL_PY:
+        interpolate_with_gdal_bindings(group_df, variables, epsg, extent, cell_size, power, jobs, output_path)
+        return
+    if not GDAL_AVAILABLE:
+        raise RuntimeError("GDAL CLI tools are not available.")
+    grid = build_grid(extent, cell_size)
+    env = os.environ.copy()
+    env["GDAL_NUM_THREADS"] = str(max(1, int(jobs)))
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmpdir = Path(tmpdir)
+        subset_path = tmpdir / "points.csv"
+        export_cols = ["x", "y", *variables]
+        group_df[export_cols].to_csv(subset_path, index=False)
+        vrt_path = tmpdir / "points.vrt"
+        vrt_path.write_text(create_vrt(subset_path, "points", epsg, "x", "y"), encoding="utf-8")
+        per_band_files: List[str] = []
+        for variable in tqdm(variables, desc="Variables (GDAL)", leave=False):
+            band_path = tmpdir / f"{variable}.tif"
+            command = [
+                GDAL_CMDS["gdal_grid"],
+                "-zfield",
+                variable,
+                "-a",
+                f"invdist:power={power}",
+                "-txe",
+                str(extent[0]),
+                str(extent[2]),
+                "-tye",
+                str(extent[1]),
+                str(extent[3]),
+                "-outsize",
+                str(grid["width"]),
+                str(grid["height"]),
+                "-a_srs",
+                f"EPSG:{epsg}",
+                "-ot",
+                "Float32",
+                "-of",
+                "GTiff",
+                "-l",
+                "points",
+                str(vrt_path),
+                str(band_path),
+            ]
+            run_command(command, env=env)
+            per_band_files.append(str(band_path))
+        stack_vrt = tmpdir / "stack.vrt"
+        run_command(
+            [GDAL_CMDS["gdalbuildvrt"], "-separate", str(stack_vrt), *per_band_files],
+            env=env,
+        )
+        translate_command = [
+            GDAL_CMDS["gdal_translate"],
+            str(stack_vrt),
+            str(output_path),
+            "-co",
+            "COMPRESS=DEFLATE",
+            "-co",
+            "TILED=YES",
+            "-co",
+            "BIGTIFF=IF_SAFER",
+            "-a_nodata",
+            str(NODATA_VALUE),
+        ]
+        run_command(translate_command, env=env)
+    set_band_descriptions(output_path, variables)
+
+
+def interpolate_with_python(
+    group_df: pd.DataFrame,
+    variables: Sequence[str],
+    epsg: int,
+    extent: Tuple[float, float, float, float],
+    cell_size: float,
+    power: float,
+    jobs: int,
+    output_path: Path,
+    use_cuda: bool = False,
+) -> None:
+    if not HAS_SCIPY:
+        raise RuntimeError("SciPy is required for python_idw_kdtree interpolation.")
+    weigh = idw_weighted_cuda if use_cuda else idw_weighted_many
+    grid = build_grid(extent, cell_size)
+    shape = (grid["height"], grid["width"])
+    coords = group_df[["x", "y"]].to_numpy()
+    values = group_df[list(variables)].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float32).T
+    masks = np.isfinite(values)
+    # Variables observed at the same stations share one tree, one neighbour query and one weighting pass
+    groups = {}
+    for index in range(len(variables)):
+        if masks[index].any():
+            groups.setdefault(masks[index].tobytes(), []).append(index)
+    trees = {key: cKDTree(coords[masks[members[0]]]) for key, members in groups.items()}
+    stack_array = np.full((len(variables),) + shape, np.nan, dtype=np.float32)
+    # Query and weight row tiles so neighbour arrays stay bounded by IDW_TILE_BYTES, not the grid size
+    row_bytes = grid["width"] * IDW_NEIGHBORS * (np.dtype(np.float32).itemsize + np.dtype(np.intp).itemsize)
+    tile_rows = max(1, IDW_TILE_BYTES // row_bytes)
+    for row_start in tqdm(range(0, grid["height"], tile_rows), desc="Row tiles (Python)", leave=False):
+        rows = slice(row_start, min(row_start + tile_rows, grid["height"]))
+        tile_x, tile_y = grid["grid_x"], grid["grid_y"][rows]
+        tile_shape = (tile_y.shape[0], grid["width"])
+        for key, members in groups.items():
+            mask = masks[members[0]]
+            distances, indices = idw_neighbors(trees[key], tile_x, tile_y, max(1, int(jobs)))
+            stack_array[members, rows] = weigh(values[members][:, mask], distances, indices, power, tile_shape)
+    write_geotiff_stack(stack_array, grid["transform"], epsg, output_path, band_names=list(variables))
+
+
+def interpolate_with_pykrige(
+    group_df: pd.DataFrame,
+    variables: Sequence[str],
+    epsg: int,
+    extent: Tuple[float, float, float, float],
+    cell_size: float,
+    jobs: int,
+    output_path: Path,
+) -> None:
+    if not HAS_PYKRIGE:
+        raise RuntimeError("PyKrige is required for pykrige_ok interpolation.")
+    grid = build_grid(extent, cell_size)
+    x_coords = grid["x_coords"]
+    y_coords = grid["y_coords"]
+    stack = []
+    for variable in tqdm(variables, desc="Variables (PyKrige)", leave=False):
+        values = pd.to_numeric(group_df[variable], errors="coerce").to_numpy(dtype=np.float32)
+        mask = np.isfinite(values)
+        if mask.sum() < 3:
+            stack.append(np.full((grid["height"], grid["width"]), np.nan, dtype=np.float32))
+            continue
+        try:
+            ok = OrdinaryKriging(
+                group_df.loc[mask, "x"].to_numpy(),
+                group_df.loc[mask, "y"].to_numpy(),
+                values[mask],
+                variogram_model="spherical",
+                verbose=False,
+                enable_plotting=False,
+                coordinates_type="euclidean",
+            )
+            surface, _ = ok.execute("grid", x_coords, y_coords, backend="vectorized")
+            stack.append(np.asarray(surface, dtype=np.float32))
+        except Exception as exc:
+            print(f"Kriging failed for {variable}: {exc}")
+            stack.append(np.full((grid["height"], grid["width"]), np.nan, dtype=np.float32))
+    stack_array = np.stack(stack)
+    write_geotiff_stack(stack_array, grid["transform"], epsg, output_path, band_names=list(variables))
+
+
+def resolve_method(preferred: str) -> str:
+    if preferred == "gdal_grid" and not (HAS_GDAL_PY or GDAL_AVAILABLE):
+        print("GDAL bindings and CLI tools were not detected; switching to python_idw_kdtree.")
+        return "python_idw_kdtree"
+    if preferred == "python_idw_kdtree" and not HAS_SCIPY:
+        raise RuntimeError("SciPy is required for python_idw_kdtree.")
+    if preferred == "cuda_idw" and not HAS_CUDA:
+        print("No CUDA device was detected; switching to python_idw_kdtree.")
+        return resolve_method("python_idw_kdtree")
+    if preferred == "cuda_idw" and not HAS_SCIPY:
+        raise RuntimeError("SciPy is required for cuda_idw.")
+    if preferred == "pykrige_ok" and not HAS_PYKRIGE:
+        raise RuntimeError("PyKrige is required for pykrige_ok.")
+    return preferred
+
+
+def limit_worker_threads(threads: int) -> None:
+    if HAS_NUMBA:
+        numba.set_num_threads(max(1, min(threads, numba.config.NUMBA_NUM_THREADS)))
+
+
+def process_single_date(
+    method: str,
+    group: pd.DataFrame,
+    variable_cols: Sequence[str],
+    epsg: int,
+    extent: Tuple[float, float, float, float],
+    cell_size: float,
+    power: float,
+    jobs: int,
+    output_path: Path,
+) -> Path:
+    print(f"Interpolating {output_path.stem.replace('CHEAQI_', '')} -> {output_path.name}")
+    if method == "gdal_grid":
+        interpolate_with_gdal(group, variable_cols, epsg, extent, cell_size, power, jobs, output_path)
+    elif method == "python_idw_kdtree":
+        interpolate_with_python(group, variable_cols, epsg, extent, cell_size, power, jobs, output_path)
+    elif method == "cuda_idw":
+        interpolate_with_python(group, variable_cols, epsg, extent, cell_size, power, jobs, output_path, use_cuda=True)
+    elif method == "pykrige_ok":
+        interpolate_with_pykrige(group, variable_cols, epsg, extent, cell_size, jobs, output_path)
+    else:
+        raise ValueError(f"Unsupported method: {method}")
+    return output_path
+
+
+def process_workflow(
+    csv_path: Union[str, pd.DataFrame],
+    aoi_path: Optional[str],
+    lon_col: str,
+    lat_col: str,
+    date_col: str,
+    variable_cols: Sequence[str],
+    method: str,
+    cell_size: float,
+    power: float,
+    jobs: int,
+    output_folder: str,
+) -> None:
+    if cell_size <= 0:
+        raise ValueError("Cell size must be greater than zero.")
+    if power <= 0:
+        raise ValueError("IDW power must be positive.")
+    if jobs <= 0:
+        raise ValueError("Parallel jobs must be at least 1.")
+    if isinstance(csv_path, pd.DataFrame):
+        df = csv_path
+    else:
+        csv_path = Path(csv_path).expanduser()
+        if not csv_path.exists():
+            raise FileNotFoundError(f"CSV file not found: {csv_path}")
+        print(f"Reading CSV: {csv_path}")
+        df = pd.read_csv(csv_path)
+    output_dir = Path(output_folder).expanduser()
+    output_dir.mkdir(parents=True, exist_ok=True)
+    prepared = prepare_dataframe(df, lon_col, lat_col, date_col, variable_cols)
+    lon_mean = float(prepared[lon_col].mean())
+    lat_mean = float(prepared[lat_col].mean())
+    target_epsg = determine_utm_epsg(lon_mean, lat_mean)
+    print(f"Target CRS: EPSG:{target_epsg}")
+    projected = reproject_dataframe(prepared, lon_col, lat_col, target_epsg)
+    extent = derive_extent(projected, cell_size, aoi_path, target_epsg)
+    method_to_use = resolve_method(method)
+    grouped = list(projected.groupby("__cheaqi_date", sort=True))
+    if not grouped:
+        raise ValueError("No dated observations were found after filtering.")
+    band_records = []
+    master_plan = []
+    time_series_plan = []
+    print(f"Processing {len(grouped)} date group(s) with method '{method_to_use}'.")
+    output_paths = [output_dir / f"CHEAQI_{date_value.strftime('%Y%m%d')}.tif" for date_value, _ in grouped]
+    # Dates are independent; spread them over processes and split --jobs between dates and each date's threads
+    workers = 1 if method_to_use == "cuda_idw" else min(jobs, len(grouped))
+    if workers > 1:
+        date_jobs = max(1, jobs // workers)
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=context, initializer=limit_worker_threads, initargs=(date_jobs,)
+        ) as pool:
+            futures = [
+                pool.submit(
+                    process_single_date, method_to_use, group, variable_cols, target_epsg, extent,
+                    cell_size, power, date_jobs, output_path,
+                )
+                for (_, group), output_path in zip(grouped, output_paths)
+            ]
+            for future in tqdm(as_completed(futures), total=len(futures), desc="Dates"):
+                future.result()
+    else:
+        for (_, group), output_path in tqdm(list(zip(grouped, output_paths)), desc="Dates"):
+            process_single_date(
+                method_to_use, group, variable_cols, target_epsg, extent, cell_size, power, jobs, output_path
+            )
+    for (date_value, _), output_path in zip(grouped, output_paths):
+        label = date_value.strftime("%Y%m%d")
+        time_series_plan.append({"date": date_value, "path": str(output_path)})
+        for band_index, variable in enumerate(variable_cols, start=1):
+            master_plan.append(
+                {
+                    "path": str(output_path),
+                    "band": band_index,
+                    "label": f"{label}_{variable}",
+                }
+            )
+            band_records.append(
+                {
+                    "raster": output_path.name,
+                    "band": band_index,
+                    "date": date_value.strftime("%Y-%m-%d"),
+                    "variable": variable,
+                    "master_band": len(master_plan),
+                    "master_label": f"{label}_{variable}",
+                }
+            )
+    band_map_path = output_dir / "CHEAQI_per_date_bandmap.csv"
+    pd.DataFrame(band_records).to_csv(band_map_path, index=False)
+    print(f"Band map written to: {band_map_path}")
+    print("Building master GeoTIFF stack...")
+    master_output = output_dir / MASTER_STACK_NAME
+    try:
+        created = create_master_stack(master_plan, master_output)
+        if created:
+            set_band_descriptions(master_output, [entry["label"] for entry in master_plan])
+            print(f"Master stack created: {master_output} ({len(master_plan)} band(s)).")
+        else:
+            print("No rasters available to build a master stack.")
+    except Exception as exc:
+        print(f"Master stack creation failed: {exc}")
+    netcdf_path = output_dir / NETCDF_TIMESERIES_NAME
+    try:
+        build_timeseries_netcdf(time_series_plan, variable_cols, target_epsg, netcdf_path)
+    except Exception as exc:
+        print(f"NetCDF export failed: {exc}")
+    print(f"Interpolation complete. Outputs saved to: {output_dir}")
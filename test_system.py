@@ -4,53 +4,60 @@ CHEAQI System Test Script
 Tests all major functionality to ensure the system is working correctly
 """
 
-import requests
+import asyncio
 import json
 import time
 
+import aiohttp
+
+try:
+    import uvloop
+    HAS_UVLOOP = True
+except ImportError:
+    HAS_UVLOOP = False
+
 BASE_URL = "http://localhost:8888"
 
-def test_api_endpoint(endpoint, method="GET", data=None, expected_status=200):
+async def test_api_endpoint(session, endpoint, method="GET", data=None, expected_status=200):
     """Test an API endpoint and return the result"""
     try:
         if method == "GET":
-            response = requests.get(f"{BASE_URL}{endpoint}", timeout=10)
+            request = session.get(endpoint, timeout=aiohttp.ClientTimeout(total=10))
         elif method == "POST":
-            response = requests.post(f"{BASE_URL}{endpoint}", 
-                                   json=data, 
-                                   headers={'Content-Type': 'application/json'}, 
-                                   timeout=30)
-        
-        print(f"✅ {endpoint} - Status: {response.status_code}")
+            request = session.post(endpoint, json=data, timeout=aiohttp.ClientTimeout(total=30))
         
-        if response.status_code == expected_status:
-            try:
-                return response.json()
-            except:
-                return {"raw_content": response.text}
-        else:
-            print(f"❌ Expected {expected_status}, got {response.status_code}")
-            return None
+        async with request as response:
+            print(f"✅ {endpoint} - Status: {response.status}")
+            
+            if response.status == expected_status:
+                text = await response.text()
+                try:
+                    return json.loads(text)
+                except:
+                    return {"raw_content": text}
+            else:
+                print(f"❌ Expected {expected_status}, got {response.status}")
+                return None
             
     except Exception as e:
         print(f"❌ {endpoint} - Error: {str(e)}")
         return None
 
-def main():
+async def run_all(session):
     """Run comprehensive system tests"""
     print("🚀 CHEAQI System Test Suite")
     print("=" * 50)
     
-    # Test 1: Basic connectivity
-    print("\n📡 Testing Basic Connectivity...")
-    home_response = test_api_endpoint("/")
+    # Tests 1-2: Basic connectivity and Files API
+    print("\n📡 Testing Basic Connectivity and File Management...")
+    home_response, files_data = await asyncio.gather(
+        test_api_endpoint(session, "/"),
+        test_api_endpoint(session, "/api/files"),
+    )
     if home_response is None:
         print("❌ Cannot connect to CHEAQI system")
         return
     
-    # Test 2: Files API
-    print("\n📁 Testing File Management...")
-    files_data = test_api_endpoint("/api/files")
     if files_data and files_data.get('success'):
         print(f"   Files available: {len(files_data.get('files', []))}")
         available_files = files_data.get('files', [])
@@ -64,9 +71,18 @@ def main():
         print("❌ Files API failed")
         return
     
+    # Tests 3-5 only depend on the file listing, so they run concurrently
+    print("\n🔍 Testing Variable Selection, CSV Analysis, Variable Explorer and Summary...")
+    var_data, csv_info, explorer_data, summary_data = await asyncio.gather(
+        test_api_endpoint(session, f"/api/variable_selection/{test_file}"),
+        test_api_endpoint(session, f"/api/csv_info/{test_file}"),
+        test_api_endpoint(session, f"/api/get_all_variables/{test_file}"),
+        test_api_endpoint(session, "/api/process_csv", method="POST",
+                          data={"filename": test_file, "operation": "summary"}),
+    )
+    
     # Test 3: Variable Selection
-    print("\n🔍 Testing Variable Selection...")
-    var_data = test_api_endpoint(f"/api/variable_selection/{test_file}")
+    print("\n🔍 Variable Selection...")
     if var_data:
         variables = var_data.get('variables', [])
         coordinates = var_data.get('coordinates', {})
@@ -89,19 +105,24 @@ def main():
         return
     
     # Test 4: CSV Info API
-    print("\n📊 Testing CSV Analysis...")
-    csv_info = test_api_endpoint(f"/api/csv_info/{test_file}")
+    print("\n📊 CSV Analysis...")
     if csv_info:
         print(f"   Total columns: {len(csv_info.get('columns', []))}")
         print(f"   Data shape: {csv_info.get('shape', 'Unknown')}")
     
     # Test 5: Variable Explorer (Advanced)
-    print("\n🔍 Testing Advanced Variable Explorer...")
-    explorer_data = test_api_endpoint(f"/api/get_all_variables/{test_file}")
+    print("\n🔍 Advanced Variable Explorer...")
     if explorer_data:
         print(f"   Advanced analysis completed")
     
-    # Test 6: Interpolation (if we have valid inputs)
+    # Test 6: CSV Summary
+    print("\n📈 CSV Summary...")
+    if summary_data and 'numeric_summary' in summary_data:
+        print(f"   Numeric columns summarized: {len(summary_data['numeric_summary'])}")
+    else:
+        print("❌ Summary operation failed")
+    
+    # Test 7: Interpolation (if we have valid inputs)
     if test_variables and lat_col and lon_col:
         print("\n⚡ Testing Spatial Interpolation...")
         interpolation_data = {
@@ -112,19 +133,35 @@ def main():
             "method": "kriging"
         }
         
-        interp_result = test_api_endpoint("/api/run_interpolation", 
-                                        method="POST", 
-                                        data=interpolation_data,
-                                        expected_status=200)
+        interp_job = await test_api_endpoint(session, "/api/run_interpolation", 
+                                             method="POST", 
+                                             data=interpolation_data,
+                                             expected_status=202)
         
-        if interp_result:
-            if interp_result.get('success'):
-                print("✅ Interpolation completed successfully")
-                processed = interp_result.get('variables_successful', 0)
-                total = interp_result.get('variables_requested', 0)
-                print(f"   Variables processed: {processed}/{total}")
+        if interp_job and interp_job.get('job_id'):
+            print(f"   Job queued: {interp_job['job_id']}")
+            interp_result = {'status': 'running'}
+            deadline = time.monotonic() + 300
+            while interp_result.get('status') == 'running' and time.monotonic() < deadline:
+                await asyncio.sleep(2)
+                interp_result = await test_api_endpoint(session, interp_job['status_url']) or {}
+            
+            if interp_result.get('status') == 'completed':
+                results = interp_result.get('results', {})
+                processed = sum(1 for r in results.values() if 'output_file' in r)
+                output_files = interp_result.get('output_files', [])
+                if processed and len(output_files) == processed:
+                    print("✅ Interpolation completed successfully")
+                else:
+                    print("❌ Interpolation completed without output files")
+                print(f"   Variables processed: {processed}/{len(test_variables)}")
+                print(f"   Output files: {len(output_files)}")
+            elif interp_result.get('status') == 'running':
+                print("❌ Interpolation did not finish in time")
             else:
                 print(f"❌ Interpolation failed: {interp_result.get('error', 'Unknown error')}")
+        else:
+            print("❌ Interpolation job was not queued")
         
     else:
         print("\n⚠️ Skipping interpolation test (insufficient data)")
@@ -137,5 +174,13 @@ def main():
     print("   If you see ❌ marks, there are issues that need fixing.")
     print("=" * 50)
 
+async def main():
+    """Share one keep-alive session across all probes"""
+    connector = aiohttp.TCPConnector(limit=8)
+    async with aiohttp.ClientSession(base_url=BASE_URL, connector=connector) as session:
+        await run_all(session)
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    if HAS_UVLOOP:
+        uvloop.install()
+    asyncio.run(main())
@@ -5,16 +5,20 @@ import json
 
 print("=== UGANDA ANALYSIS TEST ===")
 
+# Target variables
+target_vars = ['NDVI', 'pm25', 'no2', 'WRND', 'EH', 'EM', 'T2M', 'RH', 'LST', 'ET', 'TP', 'BLH']
+
 # Load Uganda data
-df = pd.read_csv('/app/data/Uganda_Daily.csv')
+df = pd.read_csv(
+    '/app/data/Uganda_Daily.csv',
+    dtype={'country': 'category', **{var: 'float32' for var in target_vars}},
+)
 print(f"Total records: {len(df)}")
 
 # Filter for Uganda
-uganda_df = df[df['country'] == 'Uganda'].copy()
+uganda_df = df.query("country == 'Uganda'")
 print(f"Uganda records: {len(uganda_df)}")
 
-# Target variables
-target_vars = ['NDVI', 'pm25', 'no2', 'WRND', 'EH', 'EM', 'T2M', 'RH', 'LST', 'ET', 'TP', 'BLH']
 print(f"Target variables: {target_vars}")
 
 # Check available columns
@@ -22,9 +26,15 @@ print(f"Available columns: {list(uganda_df.columns)}")
 available_vars = [var for var in target_vars if var in uganda_df.columns]
 print(f"Available target variables: {available_vars}")
 
+# Structure-of-arrays layout: one contiguous row per variable, as the IDW kernels consume it
+vals = np.ascontiguousarray(uganda_df[available_vars[:3]].to_numpy(np.float32).T)
+
 # Basic statistics
-for var in available_vars[:3]:  # Just check first 3 variables
-    valid_data = uganda_df[var].dropna()
-    print(f"{var}: {len(valid_data)} valid points, range: {valid_data.min():.3f} to {valid_data.max():.3f}")
+valid = np.isfinite(vals)
+counts = valid.sum(axis=1)
+mins = np.where(valid, vals, np.inf).min(axis=1)
+maxs = np.where(valid, vals, -np.inf).max(axis=1)
+for var, count, vmin, vmax in zip(available_vars, counts, mins, maxs):
+    print(f"{var}: {count} valid points, range: {vmin:.3f} to {vmax:.3f}")
 
-print("=== TEST COMPLETE ===")
\ No newline at end of file
+print("=== TEST COMPLETE ===")
@@ -0,0 +1,16 @@
+#!/usr/bin/env python3
+"""
+WSGI entry point for the CHEAQI web interface
+
+    gunicorn -w 1 --threads 8 --preload -b 0.0.0.0:8888 wsgi:app
+
+One worker process keeps background job state in one place; CPU-heavy
+interpolation already fans out to app's process pool.
+"""
+
+import os
+
+from app import app, OUTPUTS_DIR, warm_idw_kernel
+
+os.makedirs(OUTPUTS_DIR, exist_ok=True)
+warm_idw_kernel()